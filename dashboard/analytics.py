@@ -0,0 +1,91 @@
+"""Call and tool-action aggregates for the Analytics page.
+
+Everything here reads the hourly rollups (see ``rollups.py``) rather than
+the raw records, so the cost depends on the time window, not on how many
+calls or actions have been stored.
+"""
+
+from __future__ import annotations
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .storage import get_rollups
+
+FAILED_STATUSES = ("failed",)
+
+
+def _since_hour(days: Optional[int]) -> Optional[int]:
+    return int(time.time() // 3600) - days * 24 + 1 if days else None
+
+
+def _frame(kind: str, client_id: Optional[str], days: Optional[int]) -> pd.DataFrame:
+    df = get_rollups().frame(kind, client_id=client_id, since_hour=_since_hour(days))
+    df["day"] = (df["hour"].to_numpy() // 24).astype("datetime64[D]")
+    return df
+
+
+def calls_per_agent_per_day(client_id: Optional[str] = None, days: int = 30) -> pd.DataFrame:
+    """Call counts with one row per UTC day and one column per agent."""
+    df = _frame("calls", client_id, days)
+    if df.empty:
+        return pd.DataFrame()
+    return df.pivot_table(index="day", columns="dim", values="n", aggfunc="sum", fill_value=0).rename_axis(
+        columns="agent_id"
+    )
+
+
+def calls_per_hour(client_id: Optional[str] = None, days: int = 2) -> pd.Series:
+    df = _frame("calls", client_id, days)
+    if df.empty:
+        return pd.Series(dtype="int64")
+    counts = df.groupby("hour")["n"].sum()
+    counts.index = counts.index.to_numpy().astype("datetime64[h]")
+    return counts
+
+
+def call_status_counts(client_id: Optional[str] = None, days: Optional[int] = 30) -> pd.DataFrame:
+    """Calls per agent and status."""
+    df = _frame("calls", client_id, days)
+    if df.empty:
+        return pd.DataFrame()
+    return df.pivot_table(index="dim", columns="status", values="n", aggfunc="sum", fill_value=0).rename_axis(
+        index="agent_id", columns=None
+    )
+
+
+def action_failure_rates(client_id: Optional[str] = None, days: Optional[int] = 30) -> pd.DataFrame:
+    """Per client and action type: total, failed, pending and the failure rate of finished actions."""
+    df = _frame("actions", client_id, days)
+    columns = ["client_id", "action_type", "total", "failed", "pending", "failure_rate"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    status = df["status"].to_numpy()
+    df["failed"] = np.where(np.isin(status, FAILED_STATUSES), df["n"], 0)
+    df["pending"] = np.where(status == "pending", df["n"], 0)
+    out = (
+        df.groupby(["client_id", "dim"], sort=True)[["n", "failed", "pending"]]
+        .sum()
+        .reset_index()
+        .rename(columns={"dim": "action_type", "n": "total"})
+    )
+    finished = (out["total"] - out["pending"]).to_numpy()
+    out["failure_rate"] = np.divide(
+        out["failed"].to_numpy(), finished, out=np.zeros(len(out)), where=finished > 0
+    ).round(4)
+    return out[columns]
+
+
+def totals(client_id: Optional[str] = None, days: Optional[int] = 30) -> Dict[str, float]:
+    calls = _frame("calls", client_id, days)
+    actions = _frame("actions", client_id, days)
+    done = actions[actions["status"] != "pending"]["n"].sum()
+    failed = actions[actions["status"].isin(FAILED_STATUSES)]["n"].sum()
+    return {
+        "calls": int(calls["n"].sum()),
+        "failed_calls": int(calls[calls["status"].isin(FAILED_STATUSES)]["n"].sum()),
+        "actions": int(actions["n"].sum()),
+        "action_failure_rate": float(failed / done) if done else 0.0,
+    }
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List
 import sys
@@ -12,6 +13,7 @@ from dashboard.schemas import (
     ClientBusinessDetails,
     KnowledgeBaseEntry,
     CallRecord,
+    ToolActionEvent,
 )
 from dashboard.utils import generate_id, now_iso, validate_drive_link, extract_text_from_pdf
 from dashboard.storage import (
@@ -21,8 +23,16 @@ from dashboard.storage import (
     list_kb_entries,
     add_call_record,
     list_call_records,
+    get_call,
     list_tool_actions,
+    add_tool_actions,
+    search_calls,
 )
+from dashboard.retrieval import index_entry, retrieve
+from dashboard import analytics, metrics
+from dashboard.audio_cache import get_cache as get_audio_cache
+from dashboard.backfill import backfill_history
+from dashboard.jobs import submit as submit_job, submit_action, in_flight as jobs_in_flight
 from dashboard.integrations import (
     fetch_elevenlabs_transcript_and_audio,
     book_google_calendar_event,
@@ -31,6 +41,8 @@ from dashboard.integrations import (
     send_brochure_action,
     update_google_sheet,
     update_crm,
+    bulk_update_crm,
+    SheetBatch,
 )
 
 
@@ -62,7 +74,7 @@ def sidebar():
     st.session_state.agent_id = AGENTS[agent_name]
     nav = st.sidebar.radio(
         "Navigate",
-        ["Business Setup", "Knowledge Base", "Calls", "Integrations & Actions"],
+        ["Business Setup", "Knowledge Base", "Calls", "Integrations & Actions", "Analytics", "Diagnostics"],
     )
     st.sidebar.caption(
         f"Agent context: {st.session_state.agent_id}. Passed to downstream actions."
@@ -116,23 +128,32 @@ def page_kb():
                 created_at=now_iso(),
             )
             saved = add_kb_entry(entry)
+            index_entry(saved)
             st.success("TXT entry saved")
             st.json(saved)
 
     with st.expander("Upload PDF"):
         pdf_file = st.file_uploader("PDF File", type=["pdf"], key="pdf_upl")
         if pdf_file and st.button("Save PDF Entry"):
-            text = extract_text_from_pdf(pdf_file.getvalue())
-            entry = KnowledgeBaseEntry(
-                kb_entry_id=generate_id("kb"),
-                client_id=client_id,
-                type="pdf",
-                value=text,
-                created_at=now_iso(),
+            progress = st.empty()
+            result = extract_text_from_pdf(
+                pdf_file.getvalue(), on_page=lambda n: progress.caption(f"Extracted {n} pages...")
             )
-            saved = add_kb_entry(entry)
-            st.success("PDF entry saved")
-            st.json(saved)
+            progress.empty()
+            if not result.ok:
+                st.error(f"PDF parsing failed: {result.error}")
+            else:
+                entry = KnowledgeBaseEntry(
+                    kb_entry_id=generate_id("kb"),
+                    client_id=client_id,
+                    type="pdf",
+                    value=result.text,
+                    created_at=now_iso(),
+                )
+                saved = add_kb_entry(entry)
+                index_entry(saved)
+                st.success("PDF entry saved" + (" (cached extraction)" if result.cached else ""))
+                st.json(saved)
 
     with st.expander("Google Drive Link"):
         drive_link = st.text_input("Drive URL")
@@ -153,6 +174,13 @@ def page_kb():
 
     # Entries list removed per request
 
+    with st.expander("Test Retrieval"):
+        kb_query = st.text_input("Caller question", key="kb_query")
+        if kb_query.strip() and client_id:
+            for hit in retrieve(client_id, kb_query, k=3):
+                st.caption(f"{hit['kb_entry_id']} [{hit['start']}:{hit['end']}] score={hit['score']:.3f}")
+                st.write(hit["text"])
+
 
 def page_calls():
     st.header("Call Tracking and Records")
@@ -185,6 +213,18 @@ def page_calls():
             st.success("Call record saved")
             st.json(saved)
 
+    with st.expander("Backfill ElevenLabs History"):
+        st.caption("Imports every history item not yet stored for this client; resumes where the last run stopped.")
+        if st.button("Start Backfill"):
+            api_key = os.getenv("ELEVENLABS_API_KEY")
+            if not api_key:
+                st.error("Missing ELEVENLABS_API_KEY")
+            elif not client_id:
+                st.warning("Set a Client ID in Business Setup first.")
+            else:
+                submit_job(lambda: asyncio.run(backfill_history(client_id, agent_id, api_key)))
+                st.info("Backfill queued")
+
     st.subheader("Call List")
     f_client = st.text_input("Filter Client ID", value=client_id)
     f_status = st.selectbox("Status", [None, "completed", "failed"])
@@ -192,6 +232,7 @@ def page_calls():
     per_page = st.selectbox("Per Page", [5, 10, 20], index=1, key="call_pp")
     sort_by = st.selectbox("Sort By", ["timestamp", "callee"], key="call_sort_by")
     sort_order = st.selectbox("Order", ["asc", "desc"], index=1, key="call_sort_order")
+    # Paged on the backend without transcripts; the transcript is loaded for the selected call below
     resp = list_call_records(
         client_id=f_client or None,
         agent_id=agent_id,
@@ -206,14 +247,33 @@ def page_calls():
     )
     st.dataframe(resp["items"], use_container_width=True)
 
-    sel = st.selectbox("Select Call for Detail", ["-"] + [it["call_id"] for it in resp["items"]])
+    q = st.text_input("Search transcripts", key="call_search")
+    if q.strip():
+        hits = search_calls(q, client_id=f_client or None, agent_id=agent_id)
+        st.caption(f"{len(hits)} matching calls")
+        st.dataframe(
+            [{k: h.get(k) for k in ("call_id", "timestamp", "callee", "call_status", "score", "snippet")} for h in hits],
+            use_container_width=True,
+        )
+
+    sel = st.selectbox("Select Call for Detail", ["-"] + [c["call_id"] for c in resp["items"]])
     if sel != "-":
-        call = next((it for it in resp["items"] if it["call_id"] == sel), None)
+        call = get_call(sel)
         if call:
             st.write("Transcript:")
             st.code(call["transcript"])
             if call.get("audio_url"):
-                st.audio(call["audio_url"])
+                try:
+                    # Served from the local cache (Opus once transcoded) instead of re-downloading
+                    cache = get_audio_cache()
+                    audio = cache.playable(call["audio_url"])
+                    st.audio(audio.path, format=audio.mime)
+                    peaks = cache.waveform(audio.sha256)
+                    if peaks:
+                        st.area_chart(peaks, height=80)
+                except Exception as e:
+                    st.caption(f"Audio cache unavailable ({e}); streaming from source")
+                    st.audio(call["audio_url"])
             if call.get("error_message"):
                 st.error(call["error_message"])
 
@@ -238,11 +298,10 @@ def page_integrations():
                 "start": {"dateTime": start},
                 "end": {"dateTime": end},
             }
-            event = book_google_calendar_event(client_id, token, calendar_id, payload)
-            from dashboard.storage import add_tool_action
-            from dashboard.schemas import ToolActionEvent
-            add_tool_action(ToolActionEvent(**event))
-            st.json(event)
+            event = submit_action(
+                client_id, "calendar_booking", book_google_calendar_event, client_id, token, calendar_id, payload
+            )
+            st.info(f"Queued {event['action_id']}")
     else:
         st.caption("Purpose: Schedule via Calendly; inputs: scheduling link, invitee, token")
         token = os.getenv("CALENDLY_API_TOKEN")
@@ -250,11 +309,11 @@ def page_integrations():
         inv_name = st.text_input("Invitee Name")
         inv_email = st.text_input("Invitee Email")
         if st.button("Book via Calendly"):
-            event = create_calendly_invite(client_id, link, {"name": inv_name, "email": inv_email}, token)
-            from dashboard.storage import add_tool_action
-            from dashboard.schemas import ToolActionEvent
-            add_tool_action(ToolActionEvent(**event))
-            st.json(event)
+            event = submit_action(
+                client_id, "calendar_booking", create_calendly_invite,
+                client_id, link, {"name": inv_name, "email": inv_email}, token,
+            )
+            st.info(f"Queued {event['action_id']}")
 
     st.subheader("Send Email")
     st.caption("Purpose: Send email; inputs: SMTP creds, to, subject, content")
@@ -262,34 +321,35 @@ def page_integrations():
     subject = st.text_input("Subject")
     content = st.text_area("Content")
     if st.button("Send Email"):
-        event = send_email_action(client_id, to_email, subject, content)
-        from dashboard.storage import add_tool_action
-        from dashboard.schemas import ToolActionEvent
-        add_tool_action(ToolActionEvent(**event))
-        st.json(event)
+        event = submit_action(client_id, "email", send_email_action, client_id, to_email, subject, content)
+        st.info(f"Queued {event['action_id']}")
 
     st.subheader("Send Brochure")
     st.caption("Purpose: Send brochure; inputs: file content")
     broch = st.file_uploader("Upload Brochure (PDF)", type=["pdf"], key="brochure")
     if broch and st.button("Send Brochure"):
-        event = send_brochure_action(client_id, broch.name, len(broch.getvalue()))
-        from dashboard.storage import add_tool_action
-        from dashboard.schemas import ToolActionEvent
-        add_tool_action(ToolActionEvent(**event))
-        st.json(event)
+        event = submit_action(client_id, "brochure", send_brochure_action, client_id, broch.name, len(broch.getvalue()))
+        st.info(f"Queued {event['action_id']}")
 
     st.subheader("Google Sheets Update")
     st.caption("Purpose: Update sheet; inputs: service account JSON, sheet_id, range, values")
     sheet_id = st.text_input("Sheet ID")
     range_a1 = st.text_input("Range (A1)")
     values_raw = st.text_area("Values (comma-separated rows)")
+    append_mode = st.checkbox("Append rows (range ignored; all rows sent in one request)")
     if st.button("Update Sheet"):
         values = [[c.strip() for c in row.split(",")] for row in values_raw.splitlines() if row.strip()]
-        event = update_google_sheet(client_id, sheet_id, range_a1, values)
-        from dashboard.storage import add_tool_action
-        from dashboard.schemas import ToolActionEvent
-        add_tool_action(ToolActionEvent(**event))
-        st.json(event)
+        if append_mode:
+            def append_rows():
+                with SheetBatch(client_id) as batch:
+                    batch.append(sheet_id, values)
+                add_tool_actions(ToolActionEvent(**e) for e in batch.events)
+
+            submit_job(append_rows)
+            st.info(f"Queued {len(values)} rows")
+        else:
+            event = submit_action(client_id, "sheet_update", update_google_sheet, client_id, sheet_id, range_a1, values)
+            st.info(f"Queued {event['action_id']}")
 
     st.subheader("CRM Update")
     st.caption("Purpose: Update CRM; inputs: CRM type, token env, payload")
@@ -302,32 +362,105 @@ def page_integrations():
         except Exception as e:
             st.error(f"Invalid JSON: {e}")
             payload = {}
-        event = update_crm(client_id, crm, payload)
-        from dashboard.storage import add_tool_action
-        from dashboard.schemas import ToolActionEvent
-        add_tool_action(ToolActionEvent(**event))
-        st.json(event)
+        event = submit_action(client_id, "crm_update", update_crm, client_id, crm, payload)
+        st.info(f"Queued {event['action_id']}")
+    bulk_txt = st.text_area("Bulk Payloads (JSON array, synced 100 per request)")
+    if st.button("Bulk Sync CRM"):
+        import json
+        try:
+            payloads = json.loads(bulk_txt or "[]")
+        except Exception as e:
+            st.error(f"Invalid JSON: {e}")
+            payloads = []
+        if payloads:
+            submit_job(
+                lambda: add_tool_actions(ToolActionEvent(**e) for e in bulk_update_crm(client_id, crm, payloads))
+            )
+            st.info(f"Queued {len(payloads)} records for {crm}")
 
     st.subheader("Action Logs")
     page = st.number_input("Page", min_value=1, value=1, key="act_page")
     per_page = st.selectbox("Per Page", [5, 10, 20], index=1, key="act_pp")
     sort_by = st.selectbox("Sort By", ["timestamp", "action_type", "status"], key="act_sort_by")
     sort_order = st.selectbox("Order", ["asc", "desc"], index=1, key="act_sort_order")
-    resp = list_tool_actions(
-        client_id=client_id or None,
-        page=page,
-        per_page=int(per_page),
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
-    st.caption(
-        f"Pagination: page={resp['page']}, per_page={resp['per_page']}, total_items={resp['total_items']}"
-    )
-    st.dataframe(resp["items"], use_container_width=True)
+
+    # Only this table reruns on a timer, and only while background jobs are still running
+    @st.fragment(run_every=2 if jobs_in_flight() else None)
+    def action_logs():
+        resp = list_tool_actions(
+            client_id=client_id or None,
+            page=page,
+            per_page=int(per_page),
+            sort_by=sort_by,
+            sort_order=sort_order,
+        )
+        st.caption(
+            f"Pagination: page={resp['page']}, per_page={resp['per_page']}, total_items={resp['total_items']}"
+            + (f" | {jobs_in_flight()} jobs running" if jobs_in_flight() else "")
+        )
+        st.dataframe(resp["items"], use_container_width=True)
+
+    action_logs()
+
+
+def page_analytics():
+    st.header("Analytics")
+    col1, col2 = st.columns(2)
+    with col1:
+        client_id = st.text_input("Client ID (blank for all)", value=st.session_state.client_id_ctx, key="an_client")
+    with col2:
+        days = st.slider("Days", min_value=1, max_value=90, value=30, key="an_days")
+    client_id = client_id or None
+
+    summary = analytics.totals(client_id, days)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Calls", summary["calls"])
+    m2.metric("Failed calls", summary["failed_calls"])
+    m3.metric("Actions", summary["actions"])
+    m4.metric("Action failure rate", f"{summary['action_failure_rate']:.1%}")
+
+    st.subheader("Calls per agent per day")
+    per_day = analytics.calls_per_agent_per_day(client_id, days)
+    if per_day.empty:
+        st.info("No calls in this window")
+    else:
+        st.bar_chart(per_day)
+        st.dataframe(analytics.call_status_counts(client_id, days), use_container_width=True)
+
+    st.subheader("Action failure rate by type")
+    st.dataframe(analytics.action_failure_rates(client_id, days), use_container_width=True)
+
+
+@st.cache_resource
+def metrics_server():
+    # One exporter per process, only when a port is configured
+    port = os.getenv("KALLIX_METRICS_PORT")
+    return metrics.start_http_server(int(port)) if port else None
+
+
+def page_diagnostics():
+    st.header("Diagnostics")
+    st.caption("Storage, integration and HTTP metrics for this dashboard process since it started (or was reset).")
+    rows = metrics.REGISTRY.summary()
+    if rows:
+        st.subheader("Latency")
+        st.dataframe(rows, use_container_width=True)
+    else:
+        st.info("No operations recorded yet")
+    counters = metrics.REGISTRY.counter_rows()
+    if counters:
+        st.subheader("Counters")
+        st.dataframe(counters, use_container_width=True)
+    with st.expander("Prometheus exposition"):
+        st.code(metrics.render(), language="text")
+    if st.button("Reset metrics"):
+        metrics.reset()
+        st.rerun()
 
 
 def main():
     ensure_session()
+    metrics_server()
     nav = sidebar()
     if nav == "Business Setup":
         page_business_setup()
@@ -337,6 +470,10 @@ def main():
         page_calls()
     elif nav == "Integrations & Actions":
         page_integrations()
+    elif nav == "Analytics":
+        page_analytics()
+    elif nav == "Diagnostics":
+        page_diagnostics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""Content-addressed on-disk cache for call recordings.
+
+Recordings are downloaded once and stored under the SHA-256 of their bytes,
+so the same audio behind different URLs is kept once. A background worker
+derives a compact Opus version (when ffmpeg is available) and a waveform
+thumbnail for each recording. The cache is bounded by total bytes and evicts
+the least recently used files first.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+from pydantic import BaseModel
+
+from .backends.locking import atomic_write_text
+from .http_clients import get_client
+from .storage import DATA_DIR
+
+AUDIO_CACHE_DIR = Path(os.getenv("KALLIX_AUDIO_CACHE_DIR", str(DATA_DIR / "audio_cache")))
+AUDIO_CACHE_MAX_BYTES = int(float(os.getenv("KALLIX_AUDIO_CACHE_MB", "1024")) * 1024 * 1024)
+OPUS_BITRATE = "24k"
+WAVEFORM_POINTS = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    sha256 TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mime TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (sha256, variant)
+);
+CREATE INDEX IF NOT EXISTS idx_files_lru ON files (last_access);
+"""
+
+
+class CachedAudio(BaseModel):
+    sha256: str
+    variant: str  # "original", "opus" or "waveform"
+    path: str
+    size: int
+    mime: str
+
+
+def waveform_peaks(samples: np.ndarray, max_value: float, points: int = WAVEFORM_POINTS) -> List[float]:
+    # Peak absolute amplitude per bucket, scaled to 0..1
+    if samples.size == 0:
+        return []
+    points = min(points, samples.size)
+    usable = samples[: samples.size - samples.size % points].reshape(points, -1)
+    return np.round(np.abs(usable.astype(np.float32)).max(axis=1) / max_value, 4).tolist()
+
+
+class AudioCache:
+    """Recordings on disk keyed by content hash, with an SQLite index for URLs and LRU state."""
+
+    def __init__(self, root: Path, max_bytes: int = AUDIO_CACHE_MAX_BYTES, transcode: bool = True):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.transcode = transcode
+        self.ffmpeg = shutil.which("ffmpeg") is not None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kallix-transcode")
+        self._queued: Set[str] = set()
+
+    def _file_path(self, sha: str, variant: str, ext: str) -> Path:
+        return self.root / sha[:2] / f"{sha}.{variant}{ext}"
+
+    def _get(self, sha: str, variant: str) -> Optional[CachedAudio]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mime FROM files WHERE sha256 = ? AND variant = ?", (sha, variant)
+            ).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                self._conn.execute("DELETE FROM files WHERE sha256 = ? AND variant = ?", (sha, variant))
+                return None
+            self._conn.execute(
+                "UPDATE files SET last_access = ? WHERE sha256 = ? AND variant = ?", (time.time(), sha, variant)
+            )
+        return CachedAudio(sha256=sha, variant=variant, path=row[0], size=row[1], mime=row[2])
+
+    def _put(self, sha: str, variant: str, path: Path, mime: str) -> CachedAudio:
+        size = path.stat().st_size
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (sha256, variant, path, size, mime, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (sha, variant, str(path), size, mime, time.time()),
+            )
+        self._evict(keep=(sha, variant))
+        return CachedAudio(sha256=sha, variant=variant, path=str(path), size=size, mime=mime)
+
+    def _write_blob(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _evict(self, keep: Tuple[str, str]) -> None:
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for sha, variant, path, size in self._conn.execute(
+                "SELECT sha256, variant, path, size FROM files ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                if (sha, variant) == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._conn.execute("DELETE FROM files WHERE sha256 = ? AND variant = ?", (sha, variant))
+                total -= size
+            # URLs whose recording is entirely gone would otherwise point at nothing
+            self._conn.execute("DELETE FROM urls WHERE sha256 NOT IN (SELECT sha256 FROM files)")
+
+    def _sha_for(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> CachedAudio:
+        """The original recording for ``url``, downloading it on a miss."""
+        sha = self._sha_for(url)
+        cached = self._get(sha, "original") if sha else None
+        if cached is not None:
+            return cached
+        resp = get_client("audio").get(url, headers=headers or {}, follow_redirects=True)
+        resp.raise_for_status()
+        data = resp.content
+        sha = hashlib.sha256(data).hexdigest()
+        mime = resp.headers.get("Content-Type", "").split(";")[0].strip() or mimetypes.guess_type(url)[0] or "audio/mpeg"
+        ext = mimetypes.guess_extension(mime) or Path(url.split("?")[0]).suffix or ".bin"
+        cached = self._get(sha, "original")
+        if cached is None:
+            path = self._file_path(sha, "original", ext)
+            self._write_blob(path, data)
+            cached = self._put(sha, "original", path, mime)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, fetched_at) VALUES (?, ?, ?)", (url, sha, time.time())
+            )
+        self._queue_transcode(sha)
+        return cached
+
+    def playable(self, url: str, headers: Optional[Dict[str, str]] = None) -> CachedAudio:
+        """Best local version of ``url``: the Opus copy once it exists, else the original."""
+        sha = self._sha_for(url)
+        if sha:
+            opus = self._get(sha, "opus")
+            if opus is not None:
+                return opus
+        return self.fetch(url, headers)
+
+    def waveform(self, sha: str) -> Optional[List[float]]:
+        cached = self._get(sha, "waveform")
+        if cached is None:
+            return None
+        return json.loads(Path(cached.path).read_text(encoding="utf-8"))
+
+    def _queue_transcode(self, sha: str) -> None:
+        if not self.transcode:
+            return
+        with self._lock:
+            if sha in self._queued:
+                return
+            self._queued.add(sha)
+        self._worker.submit(self._transcode, sha)
+
+    def _transcode(self, sha: str) -> None:
+        try:
+            original = self._get(sha, "original")
+            if original is None:
+                return
+            from pydub import AudioSegment  # type: ignore
+
+            try:
+                segment = AudioSegment.from_file(original.path)
+            except Exception as e:
+                logger.warning(f"Audio {sha[:12]}: cannot decode for transcoding ({e})")
+                return
+            mono = segment.set_channels(1)
+            samples = np.array(mono.get_array_of_samples())
+            peaks = waveform_peaks(samples, float(1 << (8 * mono.sample_width - 1)))
+            wave_path = self._file_path(sha, "waveform", ".json")
+            wave_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(wave_path, json.dumps(peaks))
+            self._put(sha, "waveform", wave_path, "application/json")
+            if self.ffmpeg and self._get(sha, "opus") is None:
+                opus_path = self._file_path(sha, "opus", ".ogg")
+                tmp = opus_path.with_name(f".{opus_path.name}.tmp")
+                mono.set_frame_rate(16000).export(
+                    str(tmp), format="ogg", codec="libopus", bitrate=OPUS_BITRATE
+                )
+                os.replace(tmp, opus_path)
+                self._put(sha, "opus", opus_path, "audio/ogg")
+        except Exception:
+            logger.exception(f"Audio {sha[:12]}: transcoding failed")
+        finally:
+            with self._lock:
+                self._queued.discard(sha)
+
+    def close(self) -> None:
+        self._worker.shutdown(wait=True)
+        self._conn.close()
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AudioCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AudioCache(AUDIO_CACHE_DIR)
+    return _cache
@@ -0,0 +1,8 @@
+"""Pluggable storage backends used by ``dashboard.storage``."""
+
+from .base import TABLES, StorageBackend
+from .json_file import JsonFileBackend
+from .jsonl_log import JsonlLogBackend
+from .sqlite import SqliteBackend
+
+__all__ = ["TABLES", "StorageBackend", "JsonFileBackend", "JsonlLogBackend", "SqliteBackend"]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Logical tables and their primary keys
+TABLES: Dict[str, str] = {
+    "clients": "client_id",
+    "kb_entries": "kb_entry_id",
+    "calls": "call_id",
+    "actions": "action_id",
+}
+
+# Free-text field that full-text search covers, per table
+SEARCH_FIELDS: Dict[str, str] = {
+    "calls": "transcript",
+    "kb_entries": "value",
+}
+
+# Large payload fields that list queries can leave out (``exclude``); ``get`` returns them
+HEAVY_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "calls": ("transcript",),
+    "kb_entries": ("value",),
+}
+
+
+def project(items: List[Dict[str, Any]], exclude: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    if not exclude:
+        return items
+    return [{k: v for k, v in it.items() if k not in exclude} for it in items]
+
+
+class StorageBackend:
+    """Interface every storage backend implements.
+
+    Items are plain dicts as produced by ``model_dump()``; ``filters`` maps a
+    field name to the exact value it must equal. Missing or null sort values
+    sort as ``""``.
+    """
+
+    name = "base"
+
+    def upsert(self, table: str, item: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def bulk_upsert(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        """Insert-or-replace many items in one write/transaction; returns how many."""
+        n = 0
+        for item in items:
+            self.upsert(table, item)
+            n += 1
+        return n
+
+    def append(self, table: str, item: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def get(self, table: str, key: Any) -> Optional[Dict[str, Any]]:
+        """The full item whose primary key is ``key``, or None."""
+        raise NotImplementedError
+
+    def iter_items(
+        self, table: str, filters: Dict[str, Any], batch_size: int = 1000, exclude: Tuple[str, ...] = ()
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream matching items in insertion order without materializing a result list.
+
+        Fields named in ``exclude`` are left out of the items.
+        """
+        raise NotImplementedError
+
+    def version(self, table: str) -> Hashable:
+        """Cheap token that changes whenever ``table`` is written, by this process or any other."""
+        raise NotImplementedError
+
+    def search(self, table: str, query: str, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """BM25-ranked matches of ``query`` in the table's SEARCH_FIELDS field.
+
+        Every query term must appear. Each result is a copy of the item with
+        ``score`` (higher is better) and a bracketed ``snippet`` added.
+        """
+        raise NotImplementedError
+
+    def query(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+        offset: int,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        exclude: Tuple[str, ...] = (),
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, int]]]:
+        """Return ``(page items, total matches, last key)``.
+
+        Rows are ordered by ``(sort value, insertion sequence)``. ``last key``
+        is that pair for the final item on the page; passing it back as
+        ``after`` resumes right after it (keyset pagination, ``offset`` is
+        then ignored). Fields named in ``exclude`` are left out of the items.
+        """
+        raise NotImplementedError
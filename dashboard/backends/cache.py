@@ -0,0 +1,176 @@
+from __future__ import annotations
+import bisect
+import heapq
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Pages ending at or before this row are picked with a heap instead of a full sort
+TOP_K_LIMIT = 1000
+
+
+class CachedTable:
+    """Parsed items of one table plus lazily built secondary indexes.
+
+    ``indexes[field][value]`` lists the positions of the items whose ``field``
+    equals ``value``, in insertion order. Callers must treat ``items`` as
+    read-only; anything that reorders them has to copy first.
+    """
+
+    def __init__(self, signature: Hashable, items: List[Dict[str, Any]], pk: str):
+        self.signature = signature
+        self.items = items
+        self.pk = pk
+        self.indexes: Dict[str, Dict[Any, List[int]]] = {}
+        self._pk_index: Optional[Dict[Any, int]] = None
+        self._orders: Dict[str, List[Tuple[Any, int]]] = {}
+        # Backend-specific bookkeeping, e.g. how far into a log file we have read
+        self.extra: Dict[str, Any] = {}
+
+    def copy(self, signature: Hashable) -> "CachedTable":
+        # Copy-on-refresh so readers holding the old table never see it change
+        clone = CachedTable(signature, list(self.items), self.pk)
+        clone._pk_index = dict(self.pk_index)
+        return clone
+
+    @property
+    def pk_index(self) -> Dict[Any, int]:
+        if self._pk_index is None:
+            self._pk_index = {it.get(self.pk): i for i, it in enumerate(self.items)}
+        return self._pk_index
+
+    def index(self, field: str) -> Dict[Any, List[int]]:
+        idx = self.indexes.get(field)
+        if idx is None:
+            idx = {}
+            for i, it in enumerate(self.items):
+                idx.setdefault(it.get(field), []).append(i)
+            self.indexes[field] = idx
+        return idx
+
+    def order(self, sort_by: str) -> List[Tuple[Any, int]]:
+        """``(sort value, position)`` for every item, ascending; cached per field."""
+        order = self._orders.get(sort_by)
+        if order is None:
+            order = sorted(((it.get(sort_by) or ""), i) for i, it in enumerate(self.items))
+            self._orders[sort_by] = order
+        return order
+
+    def add(self, item: Dict[str, Any]) -> None:
+        # Insert or replace by primary key, keeping any built indexes current
+        key = item.get(self.pk)
+        pos = self.pk_index.get(key)
+        self._orders.clear()
+        if pos is not None:
+            self.items[pos] = item
+            self.indexes.clear()
+            return
+        pos = len(self.items)
+        self.items.append(item)
+        self.pk_index[key] = pos
+        for field, idx in self.indexes.items():
+            idx.setdefault(item.get(field), []).append(pos)
+
+    def positions(self, filters: Dict[str, Any]) -> Optional[List[int]]:
+        """Ascending positions matching every ``field == value`` filter, or None for all."""
+        if not filters:
+            return None
+        candidates: Optional[List[int]] = None
+        for field, value in filters.items():
+            found = self.index(field).get(value, [])
+            if candidates is None or len(found) < len(candidates):
+                candidates = found
+        rest = list(filters.items())
+        return [i for i in candidates or [] if all(self.items[i].get(f) == v for f, v in rest)]
+
+    def select(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Items matching every ``field == value`` filter, as a new list."""
+        matches = self.positions(filters)
+        if matches is None:
+            return list(self.items)
+        return [self.items[i] for i in matches]
+
+    def page(
+        self,
+        filters: Dict[str, Any],
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+        offset: int,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, int]]]:
+        """One page of matching items plus the total and the ``(sort value, position)``
+        key of the last item, which a caller can pass back as ``after`` to resume.
+
+        Ties sort by position, so desc is the exact reverse of asc, like the
+        original reverse-after-stable-sort. A first page is picked with a heap
+        (O(n log k)); cursor pages bisect into the cached sort order.
+        """
+        matches = self.positions(filters)
+        total = len(self.items) if matches is None else len(matches)
+        desc = sort_order == "desc"
+
+        if not sort_by:
+            seq = range(len(self.items)) if matches is None else matches
+            start = bisect.bisect_right(seq, after[1]) if after else offset
+            picked = [("", p) for p in seq[start:start + limit]]
+        elif after is None and sort_by not in self._orders and offset + limit <= TOP_K_LIMIT:
+            candidates = range(len(self.items)) if matches is None else matches
+            keyed = (((self.items[p].get(sort_by) or ""), p) for p in candidates)
+            pick = heapq.nlargest if desc else heapq.nsmallest
+            picked = pick(offset + limit, keyed)[offset:]
+        else:
+            order = self.order(sort_by)
+            allowed = None if matches is None else set(matches)
+            if after is None:
+                start, skip = (len(order) - 1 if desc else 0), offset
+            else:
+                start = bisect.bisect_left(order, tuple(after)) - 1 if desc else bisect.bisect_right(order, tuple(after))
+                skip = 0
+            step = -1 if desc else 1
+            picked = []
+            i = start
+            while 0 <= i < len(order) and len(picked) < limit:
+                key = order[i]
+                i += step
+                if allowed is not None and key[1] not in allowed:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                picked.append(key)
+
+        last = picked[-1] if picked else None
+        return [self.items[p] for _, p in picked], total, last
+
+
+class TableCache:
+    """Thread-safe per-table cache keyed on a caller-supplied signature
+    (file mtime/size/inode for the file backends)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, CachedTable] = {}
+
+    def peek(self, table: str) -> Optional[CachedTable]:
+        with self._lock:
+            return self._tables.get(table)
+
+    def get(self, table: str, signature: Hashable, pk: str, loader: Callable[[], List[Dict[str, Any]]]) -> CachedTable:
+        with self._lock:
+            cached = self._tables.get(table)
+        if cached is not None and cached.signature == signature:
+            return cached
+        fresh = CachedTable(signature, loader(), pk)
+        self.put(table, fresh)
+        return fresh
+
+    def put(self, table: str, cached: CachedTable) -> None:
+        with self._lock:
+            self._tables[table] = cached
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table, None)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def make_snippet(text: str, terms: List[str], width: int = 80) -> str:
+    # Window around the first matching term, with matches bracketed like the FTS5 snippet()
+    if not text:
+        return ""
+    lowered = text.lower()
+    hits = [lowered.find(t) for t in terms if t in lowered]
+    first = min(hits) if hits else 0
+    start = max(0, first - width // 2)
+    end = min(len(text), start + width)
+    window = text[start:end]
+    for t in sorted(set(terms), key=len, reverse=True):
+        window = re.sub(rf"(?i)\b({re.escape(t)})\b", r"[\1]", window)
+    return ("…" if start else "") + window + ("…" if end < len(text) else "")
+
+
+class FullTextIndex:
+    """Incremental in-process inverted index over one text field, ranked with BM25.
+
+    Documents are identified by their position in the table. :meth:`sync`
+    compares item identities against what was indexed last time, so only
+    new or replaced items are re-tokenized after a write.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, field: str):
+        self.field = field
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._seen: List[Any] = []
+        self._doc_terms: List[Counter] = []
+        self._doc_len: List[int] = []
+        self._total_len = 0
+        self.postings: Dict[str, Dict[int, int]] = {}
+
+    def _remove(self, pos: int) -> None:
+        for term in self._doc_terms[pos]:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(pos, None)
+                if not docs:
+                    del self.postings[term]
+        self._total_len -= self._doc_len[pos]
+
+    def _index(self, pos: int, item: Dict[str, Any]) -> None:
+        terms = Counter(tokenize(item.get(self.field) or ""))
+        if pos < len(self._seen):
+            self._remove(pos)
+            self._seen[pos] = item
+            self._doc_terms[pos] = terms
+            self._doc_len[pos] = sum(terms.values())
+        else:
+            self._seen.append(item)
+            self._doc_terms.append(terms)
+            self._doc_len.append(sum(terms.values()))
+        self._total_len += self._doc_len[pos]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[pos] = tf
+
+    def sync(self, items: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if len(items) < len(self._seen):
+                # The table shrank (e.g. compaction dropped superseded rows): start over
+                self._reset()
+            for pos, item in enumerate(items):
+                if pos >= len(self._seen) or self._seen[pos] is not item:
+                    self._index(pos, item)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        accept: Optional[Callable[[int], bool]] = None,
+    ) -> List[Tuple[float, int]]:
+        """``(score, position)`` of the best matches containing every query term."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._seen:
+                return []
+            lists = [self.postings.get(t, {}) for t in terms]
+            if any(not docs for docs in lists):
+                return []
+            n_docs = len(self._seen)
+            avg_len = self._total_len / n_docs or 1.0
+            idf = [math.log((n_docs - len(docs) + 0.5) / (len(docs) + 0.5) + 1.0) for docs in lists]
+            rarest = min(range(len(lists)), key=lambda i: len(lists[i]))
+            scored = []
+            for pos in lists[rarest]:
+                if any(pos not in docs for docs in lists):
+                    continue
+                if accept is not None and not accept(pos):
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[pos] / avg_len)
+                score = sum(w * docs[pos] * (self.k1 + 1) / (docs[pos] + norm) for w, docs in zip(idf, lists))
+                scored.append((score, pos))
+        return heapq.nlargest(limit, scored)
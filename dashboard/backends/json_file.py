@@ -0,0 +1,144 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from ..metrics import inc
+from .base import SEARCH_FIELDS, TABLES, StorageBackend, project
+from .cache import CachedTable, TableCache
+from .fulltext import FullTextIndex, make_snippet, tokenize
+from .locking import atomic_write_text, create_empty_items_file, file_lock
+
+
+class JsonFileBackend(StorageBackend):
+    """Original storage: one ``{"items": [...]}`` JSON file per table.
+
+    Read-modify-write cycles hold an exclusive ``<table>.lock`` flock and
+    replace the file atomically, so concurrent writers in other processes
+    never lose an update or leave a truncated file behind.
+
+    Parsed tables are cached in-process and reused until the file's
+    mtime/size/inode changes; the backend's own writes refresh the cache
+    directly instead of forcing a re-parse.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.paths = {table: self.data_dir / f"{table}.json" for table in TABLES}
+        self._cache = TableCache()
+        self._fulltext: Dict[str, FullTextIndex] = {}
+
+    def lock(self, table: str, shared: bool = False):
+        return file_lock(self.data_dir / f"{table}.lock", shared=shared)
+
+    def _ensure_files(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        for f in self.paths.values():
+            if not f.exists():
+                create_empty_items_file(f)
+
+    def _read_items(self, path: Path) -> List[Dict[str, Any]]:
+        self._ensure_files()
+        text = path.read_text()
+        inc("kallix_storage_bytes_read_total", len(text), backend=self.name, table=path.stem)
+        return json.loads(text or "{}").get("items", [])
+
+    def _write_items(self, path: Path, items: List[Dict[str, Any]]) -> None:
+        text = json.dumps({"items": items}, indent=2)
+        atomic_write_text(path, text)
+        inc("kallix_storage_bytes_written_total", len(text), backend=self.name, table=path.stem)
+
+    def _signature(self, table: str) -> Tuple[int, int, int]:
+        st = self.paths[table].stat()
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _table(self, table: str) -> CachedTable:
+        self._ensure_files()
+        path = self.paths[table]
+        # Stat before reading: if the file changes in between, the next call sees a new signature and reloads
+        return self._cache.get(table, self._signature(table), TABLES[table], lambda: self._read_items(path))
+
+    def _apply(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        # Insert-or-replace through the cached primary-key index (O(1) per item), then write the file once
+        with self.lock(table):
+            fresh = self._table(table).copy(None)
+            n = 0
+            for item in items:
+                fresh.add(item)
+                n += 1
+            if n:
+                # Caller holds the table lock, so the file on disk is exactly ``fresh.items``
+                self._write_items(self.paths[table], fresh.items)
+                fresh.signature = self._signature(table)
+                self._cache.put(table, fresh)
+        return n
+
+    def read_all(self, table: str) -> List[Dict[str, Any]]:
+        return list(self._table(table).items)
+
+    def upsert(self, table: str, item: Dict[str, Any]) -> None:
+        self._apply(table, [item])
+
+    def bulk_upsert(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        return self._apply(table, items)
+
+    def append(self, table: str, item: Dict[str, Any]) -> None:
+        self._apply(table, [item])
+
+    def _get_cached(self, cached: CachedTable, key: Any) -> Optional[Dict[str, Any]]:
+        pos = cached.pk_index.get(key)
+        return dict(cached.items[pos]) if pos is not None else None
+
+    def get(self, table: str, key: Any) -> Optional[Dict[str, Any]]:
+        return self._get_cached(self._table(table), key)
+
+    def version(self, table: str) -> Hashable:
+        self._ensure_files()
+        return self._signature(table)
+
+    def iter_items(
+        self, table: str, filters: Dict[str, Any], batch_size: int = 1000, exclude: Tuple[str, ...] = ()
+    ) -> Iterator[Dict[str, Any]]:
+        # The parsed table is already resident in the cache; this only avoids building another list
+        yield from _iter_cached(self._table(table), filters, exclude)
+
+    def _search_cached(
+        self, table: str, cached: CachedTable, query: str, filters: Dict[str, Any], limit: int
+    ) -> List[Dict[str, Any]]:
+        field = SEARCH_FIELDS[table]
+        index = self._fulltext.setdefault(table, FullTextIndex(field))
+        # Only items added or replaced since the last search get tokenized
+        index.sync(cached.items)
+        matches = cached.positions(filters)
+        allowed = None if matches is None else set(matches).__contains__
+        terms = tokenize(query)
+        return [
+            {**cached.items[pos], "score": score, "snippet": make_snippet(cached.items[pos].get(field) or "", terms)}
+            for score, pos in index.search(query, limit, allowed)
+        ]
+
+    def search(self, table: str, query: str, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        return self._search_cached(table, self._table(table), query, filters, limit)
+
+    def query(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+        offset: int,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        exclude: Tuple[str, ...] = (),
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, int]]]:
+        items, total, last = self._table(table).page(filters, sort_by, sort_order, offset, limit, after)
+        return project(items, exclude), total, last
+
+
+def _iter_cached(cached: CachedTable, filters: Dict[str, Any], exclude: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+    matches = cached.positions(filters)
+    for i in range(len(cached.items)) if matches is None else matches:
+        item = cached.items[i]
+        yield {k: v for k, v in item.items() if k not in exclude} if exclude else item
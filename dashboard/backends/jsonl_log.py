@@ -0,0 +1,298 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from ..metrics import inc
+from .base import TABLES, project
+from .cache import CachedTable
+from .json_file import JsonFileBackend, _iter_cached
+from .locking import atomic_write_text, create_empty_items_file
+
+# Event tables that are stored as append-only logs; the rest stay JSON files
+LOG_TABLES = ("calls", "actions")
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class JsonlLogBackend(JsonFileBackend):
+    """Append-only JSON Lines storage for calls and tool actions.
+
+    Each event is one ``os.write`` of a single line to ``<table>.jsonl`` opened
+    with ``O_APPEND``. When the active file grows past ``rotate_bytes`` it is
+    sealed as ``<table>.jsonl.<n>``. A later line with the same primary key
+    supersedes an earlier one, and :meth:`compact` folds the segments into
+    one. Appends share the table lock; rotation and compaction take it
+    exclusively. Existing ``{"items": [...]}`` files are imported on startup.
+    """
+
+    name = "jsonl"
+
+    def __init__(
+        self,
+        data_dir: Path,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        rotate_bytes: int = 64 * 1024 * 1024,
+    ):
+        super().__init__(data_dir)
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.log_paths = {table: self.data_dir / f"{table}.jsonl" for table in LOG_TABLES}
+        self._last_fsync: Dict[str, float] = {}
+        self._import_legacy()
+
+    def _import_legacy(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        for table in LOG_TABLES:
+            legacy = self.paths[table]
+            with self.lock(table):
+                if not legacy.exists() or self._segments(table) or self.log_paths[table].exists():
+                    continue
+                items = json.loads(legacy.read_text() or "{}").get("items", [])
+                atomic_write_text(self.log_paths[table], "".join(json.dumps(it) + "\n" for it in items))
+                legacy.rename(legacy.with_suffix(".json.imported"))
+
+    def _ensure_files(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        for table, f in self.paths.items():
+            if table not in LOG_TABLES and not f.exists():
+                create_empty_items_file(f)
+
+    def _segments(self, table: str) -> List[Path]:
+        active = self.log_paths[table]
+        segs = [p for p in self.data_dir.glob(f"{active.name}.*") if p.suffix[1:].isdigit()]
+        return sorted(segs, key=lambda p: int(p.suffix[1:]))
+
+    def _should_fsync(self, table: str) -> bool:
+        if self.fsync == "always":
+            return True
+        if self.fsync == "never":
+            return False
+        now = time.monotonic()
+        if now - self._last_fsync.get(table, 0.0) >= self.fsync_interval:
+            self._last_fsync[table] = now
+            return True
+        return False
+
+    def _append_line(self, table: str, item: Dict[str, Any]) -> None:
+        self._append_lines(table, [item])
+
+    def _append_lines(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        path = self.log_paths[table]
+        lines = [json.dumps(it) + "\n" for it in items]
+        if not lines:
+            return 0
+        data = "".join(lines).encode("utf-8")
+        inc("kallix_storage_bytes_written_total", len(data), backend=self.name, table=table)
+        while True:
+            with self.lock(table, shared=True):
+                fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    if not _ends_mid_line(fd):
+                        while data:
+                            data = data[os.write(fd, data):]
+                        if self._should_fsync(table):
+                            os.fsync(fd)
+                        size = os.fstat(fd).st_size
+                        break
+                finally:
+                    os.close(fd)
+            # A line torn by a crash would swallow this append; with no appender mid-write, cut it off
+            with self.lock(table):
+                if path.exists():
+                    _truncate_partial_line(path)
+        if size >= self.rotate_bytes:
+            with self.lock(table):
+                # Another writer may have rotated while we waited for the lock
+                if self.log_paths[table].exists() and self.log_paths[table].stat().st_size >= self.rotate_bytes:
+                    self._rotate(table)
+        return len(lines)
+
+    def rotate(self, table: str) -> Optional[Path]:
+        with self.lock(table):
+            return self._rotate(table)
+
+    def _rotate(self, table: str) -> Optional[Path]:
+        active = self.log_paths[table]
+        if not active.exists():
+            return None
+        segs = self._segments(table)
+        n = int(segs[-1].suffix[1:]) + 1 if segs else 1
+        sealed = active.with_name(f"{active.name}.{n}")
+        os.replace(active, sealed)
+        return sealed
+
+    def read_all(self, table: str) -> List[Dict[str, Any]]:
+        if table not in LOG_TABLES:
+            return super().read_all(table)
+        return list(self._log_table(table).items)
+
+    def _log_table(self, table: str) -> CachedTable:
+        # Re-parses only what changed: if just the active file grew, only its new tail is read
+        with self.lock(table, shared=True):
+            segs = tuple(_stat_signature(p) for p in self._segments(table))
+            active = self.log_paths[table]
+            active_sig = _stat_signature(active) if active.exists() else None
+            signature = (segs, active_sig)
+            cached = self._cache.peek(table)
+            if cached is not None and cached.signature == signature:
+                return cached
+            if (
+                cached is not None
+                and active_sig is not None
+                and cached.extra.get("segments") == segs
+                and cached.extra.get("active_ino") == active_sig[1]
+                and active_sig[2] >= cached.extra["offset"]
+            ):
+                fresh = cached.copy(signature)
+                offset = cached.extra["offset"]
+            else:
+                fresh = CachedTable(signature, [], TABLES[table])
+                for seg in self._segments(table):
+                    _read_lines(seg, 0, fresh)
+                offset = 0
+            if active_sig is not None:
+                offset = _read_lines(active, offset, fresh)
+            fresh.extra = {"segments": segs, "active_ino": active_sig[1] if active_sig else None, "offset": offset}
+            self._cache.put(table, fresh)
+            return fresh
+
+    def compact(self, table: str) -> int:
+        # Seal the active file, then fold every sealed segment into a single deduplicated one
+        with self.lock(table):
+            self._rotate(table)
+            segs = self._segments(table)
+            if not segs:
+                return 0
+            merged = CachedTable(None, [], TABLES[table])
+            for seg in segs:
+                _read_lines(seg, 0, merged)
+            atomic_write_text(segs[-1], "".join(json.dumps(it) + "\n" for it in merged.items))
+            for seg in segs[:-1]:
+                seg.unlink()
+            return len(merged.items)
+
+    def upsert(self, table: str, item: Dict[str, Any]) -> None:
+        if table in LOG_TABLES:
+            self._append_line(table, item)
+        else:
+            super().upsert(table, item)
+
+    def bulk_upsert(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        if table not in LOG_TABLES:
+            return super().bulk_upsert(table, items)
+        return self._append_lines(table, items)
+
+    def append(self, table: str, item: Dict[str, Any]) -> None:
+        if table in LOG_TABLES:
+            self._append_line(table, item)
+        else:
+            super().append(table, item)
+
+    def get(self, table: str, key: Any) -> Optional[Dict[str, Any]]:
+        if table not in LOG_TABLES:
+            return super().get(table, key)
+        return self._get_cached(self._log_table(table), key)
+
+    def version(self, table: str) -> Hashable:
+        if table not in LOG_TABLES:
+            return super().version(table)
+        active = self.log_paths[table]
+        segs = tuple(_stat_signature(p) for p in self._segments(table))
+        return segs, _stat_signature(active) if active.exists() else None
+
+    def iter_items(
+        self, table: str, filters: Dict[str, Any], batch_size: int = 1000, exclude: Tuple[str, ...] = ()
+    ) -> Iterator[Dict[str, Any]]:
+        if table not in LOG_TABLES:
+            yield from super().iter_items(table, filters, batch_size, exclude)
+            return
+        yield from _iter_cached(self._log_table(table), filters, exclude)
+
+    def search(self, table: str, query: str, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        if table not in LOG_TABLES:
+            return super().search(table, query, filters, limit)
+        return self._search_cached(table, self._log_table(table), query, filters, limit)
+
+    def query(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+        offset: int,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        exclude: Tuple[str, ...] = (),
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, int]]]:
+        if table not in LOG_TABLES:
+            return super().query(table, filters, sort_by, sort_order, offset, limit, after, exclude)
+        items, total, last = self._log_table(table).page(filters, sort_by, sort_order, offset, limit, after)
+        return project(items, exclude), total, last
+
+
+def _stat_signature(path: Path) -> Tuple[str, int, int, int]:
+    st = path.stat()
+    return (path.name, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _ends_mid_line(fd: int) -> bool:
+    size = os.fstat(fd).st_size
+    return size > 0 and os.pread(fd, 1, size - 1) != b"\n"
+
+
+def _truncate_partial_line(path: Path, chunk_size: int = 64 * 1024) -> int:
+    """Drop a trailing line that has no ``\\n`` from ``path``; returns the bytes removed."""
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        keep, end = 0, size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                keep = start + newline + 1
+                break
+            end = start
+        if keep < size:
+            f.truncate(keep)
+            os.fsync(f.fileno())
+        return size - keep
+
+
+def _read_lines(path: Path, offset: int, into: CachedTable) -> int:
+    """Parse complete lines of ``path`` from ``offset`` into ``into``; returns the new offset."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    inc("kallix_storage_bytes_read_total", len(data), backend="jsonl", table=path.name.split(".")[0])
+    # A trailing partial line is a write in progress (or torn by a crash); leave it for the next read
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            into.add(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return offset + end
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact the JSONL call/action logs")
+    parser.add_argument("--data-dir", default=str(Path(__file__).resolve().parent.parent / "data"))
+    args = parser.parse_args()
+    backend = JsonlLogBackend(Path(args.data_dir), fsync="always")
+    for table in LOG_TABLES:
+        print(f"{table}: {backend.compact(table)} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; locking degrades to a no-op
+    fcntl = None  # type: ignore
+
+
+@contextmanager
+def file_lock(lock_path: Path, shared: bool = False) -> Iterator[None]:
+    """Hold a cross-process ``flock`` on ``lock_path`` for the duration of the block."""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    # Write to a sibling temp file and rename over the target, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def create_empty_items_file(path: Path) -> None:
+    # Exclusive create: a racing process must never replace a file another one already filled
+    try:
+        with open(path, "x", encoding="utf-8") as f:
+            f.write('{\n  "items": []\n}')
+    except FileExistsError:
+        pass
@@ -0,0 +1,303 @@
+from __future__ import annotations
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from ..metrics import inc
+from .base import SEARCH_FIELDS, TABLES, StorageBackend
+from .fulltext import tokenize
+
+# Columns pulled out of the JSON document so SQL can filter and sort on them
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "clients": ("client_id", "business_name", "industry"),
+    "kb_entries": ("kb_entry_id", "client_id", "type", "created_at"),
+    "calls": ("call_id", "client_id", "agent_id", "call_status", "timestamp", "callee"),
+    "actions": ("action_id", "client_id", "action_type", "status", "timestamp"),
+}
+
+# Single-column indexes for every filter/sort column, plus (filter, sort) pairs for the
+# common "one client's newest first" pages; rowid is implicitly the last index key
+INDEXES: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "clients": (("business_name",),),
+    "kb_entries": (("client_id",), ("created_at",), ("client_id", "created_at")),
+    "calls": (
+        ("client_id",),
+        ("agent_id",),
+        ("call_status",),
+        ("timestamp",),
+        ("client_id", "timestamp"),
+        ("agent_id", "timestamp"),
+    ),
+    "actions": (
+        ("client_id",),
+        ("action_type",),
+        ("status",),
+        ("timestamp",),
+        ("client_id", "timestamp"),
+    ),
+}
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite (WAL) storage with filtering, sorting and paging done in SQL."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path, import_from: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        fresh = not self.path.exists()
+        self._create_schema()
+        if fresh and import_from:
+            for table, items in import_from.items():
+                self._insert_many(table, items, replace=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets Streamlit sessions read while another writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Lets INSERT OR REPLACE fire the delete triggers that keep the FTS tables in step
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._conn()
+        for table, cols in COLUMNS.items():
+            pk = TABLES[table]
+            col_defs = ", ".join(f"{c} TEXT PRIMARY KEY" if c == pk else f"{c} TEXT" for c in cols)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({col_defs}, data TEXT NOT NULL)")
+            for index_cols in INDEXES[table]:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index_cols)} ON {table} ({', '.join(index_cols)})"
+                )
+            # Databases written before nulls were stored as ""
+            for c in cols:
+                if c != pk:
+                    conn.execute(f"UPDATE {table} SET {c} = '' WHERE {c} IS NULL")
+        for table, field in SEARCH_FIELDS.items():
+            self._create_fts(conn, table, field)
+        # Per-table count of in-place updates and deletes, which leave MAX(rowid) unchanged (see version())
+        conn.execute("CREATE TABLE IF NOT EXISTS table_versions (tbl TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+        for table in COLUMNS:
+            for event in ("UPDATE", "DELETE"):
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN "
+                    f"INSERT INTO table_versions (tbl, n) VALUES ('{table}', 1) ON CONFLICT(tbl) DO UPDATE SET n = n + 1; "
+                    "END"
+                )
+
+    def _create_fts(self, conn: sqlite3.Connection, table: str, field: str) -> None:
+        # FTS5 index over one JSON field, kept current by triggers so every write path updates it
+        fts = f"{table}_fts"
+        existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+        body = f"json_extract(new.data, '$.{field}')"
+        conn.executescript(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(body, tokenize='unicode61');
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, body) VALUES (new.rowid, {body});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF data ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = old.rowid;
+                INSERT INTO {fts}(rowid, body) VALUES (new.rowid, {body});
+            END;
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM {fts} WHERE rowid = old.rowid;
+            END;
+            """
+        )
+        if not existed:
+            conn.execute(
+                f"INSERT INTO {fts}(rowid, body) SELECT rowid, json_extract(data, '$.{field}') FROM {table}"
+            )
+
+    def _row(self, table: str, item: Dict[str, Any]) -> Tuple[Any, ...]:
+        # Nulls are stored as "" so ORDER BY can walk the column indexes directly
+        return tuple(item.get(c) or "" for c in COLUMNS[table]) + (json.dumps(item),)
+
+    def _counted_rows(self, table: str, items: Iterable[Dict[str, Any]], written: List[int]) -> Iterator[Tuple[Any, ...]]:
+        # Serializes lazily for executemany while tallying the document bytes into written[0]
+        for it in items:
+            row = self._row(table, it)
+            written[0] += len(row[-1])
+            yield row
+
+    def _count_read(self, table: str, docs: Iterable[str]) -> None:
+        inc("kallix_storage_bytes_read_total", sum(len(d) for d in docs), backend=self.name, table=table)
+
+    def _insert_many(self, table: str, items: Iterable[Dict[str, Any]], replace: bool) -> None:
+        cols = COLUMNS[table] + ("data",)
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        sql = f"{verb} INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        conn = self._conn()
+        written = [0]
+        with conn:
+            # IMMEDIATE takes the write lock up front, so a busy writer waits out busy_timeout instead of failing
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(sql, self._counted_rows(table, items, written))
+        inc("kallix_storage_bytes_written_total", written[0], backend=self.name, table=table)
+
+    def _upsert_sql(self, table: str) -> str:
+        # ON CONFLICT keeps the original rowid, so an updated row holds its place in insertion order
+        cols = COLUMNS[table] + ("data",)
+        pk = TABLES[table]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != pk)
+        return (
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+            f"ON CONFLICT({pk}) DO UPDATE SET {updates}"
+        )
+
+    def upsert(self, table: str, item: Dict[str, Any]) -> None:
+        row = self._row(table, item)
+        self._conn().execute(self._upsert_sql(table), row)
+        inc("kallix_storage_bytes_written_total", len(row[-1]), backend=self.name, table=table)
+
+    def bulk_upsert(self, table: str, items: Iterable[Dict[str, Any]]) -> int:
+        n = 0
+
+        def counted() -> Iterator[Dict[str, Any]]:
+            nonlocal n
+            for it in items:
+                n += 1
+                yield it
+
+        written = [0]
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(self._upsert_sql(table), self._counted_rows(table, counted(), written))
+        inc("kallix_storage_bytes_written_total", written[0], backend=self.name, table=table)
+        return n
+
+    def append(self, table: str, item: Dict[str, Any]) -> None:
+        self._insert_many(table, [item], replace=False)
+
+    def get(self, table: str, key: Any) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT data FROM {table} WHERE {TABLES[table]} = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._count_read(table, row)
+        return json.loads(row[0])
+
+    def _where(self, table: str, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        for field, value in filters.items():
+            if field in COLUMNS[table]:
+                where.append(f"{field} = ?")
+            elif _FIELD_RE.match(field):
+                where.append("json_extract(data, ?) = ?")
+                params.append(f"$.{field}")
+            else:
+                raise ValueError(f"Invalid filter field: {field}")
+            params.append(value)
+        return (f" WHERE {' AND '.join(where)}" if where else ""), params
+
+    def version(self, table: str) -> Hashable:
+        # Inserts raise the max rowid; the triggers count in-place updates and deletes
+        return self._conn().execute(
+            f"SELECT (SELECT MAX(rowid) FROM {table}), (SELECT n FROM table_versions WHERE tbl = ?)", (table,)
+        ).fetchone()
+
+    def iter_items(
+        self, table: str, filters: Dict[str, Any], batch_size: int = 1000, exclude: Tuple[str, ...] = ()
+    ) -> Iterator[Dict[str, Any]]:
+        # Seek by rowid one batch at a time so no read transaction stays open between batches
+        where_sql, params = self._where(table, filters)
+        joiner = " AND " if where_sql else " WHERE "
+        data_expr = _data_expr(exclude)
+        last = 0
+        while True:
+            rows = self._conn().execute(
+                f"SELECT rowid, {data_expr} FROM {table}{where_sql}{joiner}rowid > ? ORDER BY rowid LIMIT ?",
+                params + [last, batch_size],
+            ).fetchall()
+            self._count_read(table, (data for _, data in rows))
+            for _, data in rows:
+                yield json.loads(data)
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def search(self, table: str, query: str, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        fts = f"{table}_fts"
+        where_sql, params = self._where(table, filters)
+        where_sql = where_sql.replace(" WHERE ", " AND ", 1)
+        # Quoted terms are ANDed and can't be parsed as FTS5 operators
+        match = " ".join(f'"{t}"' for t in terms)
+        rows = self._conn().execute(
+            f"SELECT t.data, -bm25({fts}), snippet({fts}, 0, '[', ']', '…', 16) "
+            f"FROM {fts} JOIN {table} t ON t.rowid = {fts}.rowid "
+            f"WHERE {fts} MATCH ?{where_sql} ORDER BY bm25({fts}) LIMIT ?",
+            [match] + params + [limit],
+        ).fetchall()
+        self._count_read(table, (r[0] for r in rows))
+        return [{**json.loads(data), "score": score, "snippet": snippet} for data, score, snippet in rows]
+
+    def _sort_expr(self, table: str, sort_by: str) -> Tuple[str, List[Any]]:
+        if sort_by in COLUMNS[table]:
+            return sort_by, []
+        return "COALESCE(json_extract(data, ?), '')", [f"$.{sort_by}"]
+
+    def query(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        sort_by: Optional[str],
+        sort_order: Optional[str],
+        offset: int,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        exclude: Tuple[str, ...] = (),
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple[Any, int]]]:
+        where_sql, params = self._where(table, filters)
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}{where_sql}", params).fetchone()[0]
+
+        # rowid breaks ties in insertion order, matching a stable sort that is reversed for desc
+        desc = sort_order == "desc"
+        direction = "DESC" if desc else "ASC"
+        cmp = "<" if desc else ">"
+        if sort_by and _FIELD_RE.match(sort_by):
+            expr, expr_params = self._sort_expr(table, sort_by)
+        else:
+            # Unsorted listings keep insertion order
+            expr, expr_params, direction, cmp = "''", [], "ASC", ">"
+        page_where_sql = where_sql
+        page_params = list(params)
+        if after is not None:
+            joiner = " AND " if where_sql else " WHERE "
+            page_where_sql += f"{joiner}({expr} {cmp} ? OR ({expr} = ? AND rowid {cmp} ?))"
+            page_params += expr_params + [after[0]] + expr_params + [after[0], after[1]]
+            offset = 0
+        data_expr = _data_expr(exclude)
+        rows = conn.execute(
+            f"SELECT {expr}, rowid, {data_expr} FROM {table}{page_where_sql} "
+            f"ORDER BY {expr} {direction}, rowid {direction} LIMIT ? OFFSET ?",
+            expr_params + page_params + expr_params + [limit, offset],
+        ).fetchall()
+        last = (rows[-1][0], rows[-1][1]) if rows else None
+        self._count_read(table, (r[2] for r in rows))
+        return [json.loads(r[2]) for r in rows], total, last
+
+
+def _data_expr(exclude: Tuple[str, ...]) -> str:
+    # Excluded fields are dropped inside SQLite, so they are never copied out or parsed
+    if not exclude:
+        return "data"
+    if not all(_FIELD_RE.match(f) for f in exclude):
+        raise ValueError(f"Invalid exclude fields: {exclude}")
+    return f"json_remove(data, {', '.join(repr('$.' + f) for f in exclude)})"
@@ -0,0 +1,212 @@
+"""Backfill call records from the ElevenLabs history API.
+
+Pages through ``/v1/history`` and fetches item details concurrently (bounded
+by a semaphore and the provider's rate limit). Details are cached locally by
+``history_item_id`` so nothing is fetched twice. Records are persisted in
+batches, and a checkpoint is written after each batch, so an interrupted run
+resumes from the last persisted page. Once a backfill has completed, later
+runs only top up the newest items.
+
+    python -m dashboard.backfill --client-id acme --agent-id real_estate_kallix
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+from loguru import logger
+
+from . import integrations, storage
+from .backends.locking import atomic_write_text
+from .http_clients import PROVIDERS, AsyncProviderClient
+from .schemas import CallRecord
+from .utils import now_iso
+
+HISTORY_CACHE_FILE = storage.DATA_DIR / "elevenlabs_history.sqlite3"
+
+
+class HistoryCache:
+    """Raw ElevenLabs history item details keyed by ``history_item_id``."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items (history_item_id TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+
+    def get(self, history_item_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM items WHERE history_item_id = ?", (history_item_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, history_item_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items (history_item_id, data, fetched_at) VALUES (?, ?, ?)",
+                (history_item_id, json.dumps(data), time.time()),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _checkpoint_path(client_id: str) -> Path:
+    return storage.DATA_DIR / f"elevenlabs_backfill_{client_id}.json"
+
+
+def _load_checkpoint(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _known_history_ids(client_id: str) -> Set[str]:
+    records = storage.iter_call_records(client_id=client_id, include_transcripts=False)
+    return {r["history_item_id"] for r in records if r.get("history_item_id")}
+
+
+def to_call_record(client_id: str, agent_id: str, data: Dict[str, Any]) -> CallRecord:
+    hid = data["history_item_id"]
+    ts = data.get("date_unix")
+    return CallRecord(
+        call_id=f"call_{hid}",  # deterministic, so re-persisting an item overwrites rather than duplicates
+        client_id=client_id,
+        timestamp=datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else now_iso(),
+        agent_id=agent_id,
+        callee=data.get("callee") or "",
+        transcript=data.get("text") or data.get("transcript") or "Transcript unavailable",
+        audio_url=data.get("audio_url") or "",
+        call_status="completed",
+        error_message=None,
+        history_item_id=hid,
+    )
+
+
+async def backfill_history(
+    client_id: str,
+    agent_id: str,
+    api_key: str,
+    concurrency: int = 8,
+    page_size: int = 100,
+    batch_size: int = 500,
+    max_items: Optional[int] = None,
+    checkpoint_path: Optional[Path] = None,
+    cache: Optional[HistoryCache] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, int]:
+    """Persist every history item not yet stored for ``client_id``; returns run counters.
+
+    ``max_items`` stops the run after roughly that many new records (the
+    checkpoint keeps the position for the next run).
+    """
+    checkpoint_path = Path(checkpoint_path or _checkpoint_path(client_id))
+    state = _load_checkpoint(checkpoint_path)
+    # A finished backfill only tops up: it walks from the newest item and stops at a fully known page
+    top_up = bool(state.get("done"))
+    cursor = None if top_up else state.get("start_after")
+    retry_ids: List[str] = list(state.get("failed_ids") or [])
+    cache = cache or HistoryCache(HISTORY_CACHE_FILE)
+    known = await asyncio.to_thread(_known_history_ids, client_id)
+    base = integrations.ELEVENLABS_API_BASE
+    headers = {"xi-api-key": api_key}
+    stats = {"pages": 0, "listed": 0, "fetched": 0, "cached": 0, "skipped": 0, "persisted": 0, "failed": 0}
+    sem = asyncio.Semaphore(concurrency)
+    failed: List[str] = []
+    buffer: List[CallRecord] = []
+
+    async def detail(hid: str) -> Optional[Dict[str, Any]]:
+        data = await asyncio.to_thread(cache.get, hid)
+        if data is not None:
+            stats["cached"] += 1
+            return data
+        async with sem:
+            try:
+                resp = await http.get(f"{base}/v1/history/{hid}", headers=headers)
+                resp.raise_for_status()
+                data = resp.json()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"History item {hid} failed: {e}")
+                stats["failed"] += 1
+                failed.append(hid)
+                return None
+        data.setdefault("history_item_id", hid)
+        await asyncio.to_thread(cache.put, hid, data)
+        stats["fetched"] += 1
+        return data
+
+    async def collect(ids: List[str]) -> None:
+        for data in await asyncio.gather(*(detail(hid) for hid in ids)):
+            if data is not None:
+                buffer.append(to_call_record(client_id, agent_id, data))
+
+    async def flush(done: bool) -> None:
+        # The checkpoint only moves once everything before the cursor is persisted
+        if buffer:
+            await asyncio.to_thread(storage.add_call_records, list(buffer))
+            known.update(r.history_item_id for r in buffer if r.history_item_id)
+            stats["persisted"] += len(buffer)
+            buffer.clear()
+        checkpoint = {"start_after": cursor, "done": done, "failed_ids": failed, "updated_at": now_iso()}
+        await asyncio.to_thread(atomic_write_text, checkpoint_path, json.dumps(checkpoint))
+
+    async with AsyncProviderClient(PROVIDERS["elevenlabs"], transport=transport) as http:
+        if retry_ids:
+            await collect([hid for hid in retry_ids if hid not in known])
+        done = False
+        while True:
+            params: Dict[str, Any] = {"page_size": page_size}
+            if cursor:
+                params["start_after_history_item_id"] = cursor
+            resp = await http.get(f"{base}/v1/history", params=params, headers=headers)
+            resp.raise_for_status()
+            page = resp.json()
+            items = page.get("history") or []
+            stats["pages"] += 1
+            stats["listed"] += len(items)
+            new_ids = [it["history_item_id"] for it in items if it["history_item_id"] not in known]
+            stats["skipped"] += len(items) - len(new_ids)
+            await collect(new_ids)
+            if items:
+                cursor = page.get("last_history_item_id") or items[-1]["history_item_id"]
+            done = not (page.get("has_more") and items) or (top_up and not new_ids)
+            if done or len(buffer) >= batch_size:
+                await flush(done=done)
+            if done or (max_items is not None and stats["persisted"] + len(buffer) >= max_items):
+                break
+    if buffer:
+        await flush(done=False)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill call records from ElevenLabs history")
+    parser.add_argument("--client-id", required=True)
+    parser.add_argument("--agent-id", required=True)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-items", type=int)
+    args = parser.parse_args()
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        raise SystemExit("Missing ELEVENLABS_API_KEY")
+    stats = asyncio.run(
+        backfill_history(args.client_id, args.agent_id, api_key, concurrency=args.concurrency, max_items=args.max_items)
+    )
+    print(", ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Storage throughput benchmark at increasing data sizes.
+
+Generates deterministic synthetic clients, calls and actions (seeded, so
+runs are comparable), loads them through ``dashboard.storage`` into a fresh
+data directory and times insert, list, filter, sort, cursor pagination,
+columnar frames and point reads:
+
+    python -m dashboard.bench --backend sqlite --scale 1k 100k 1M --json bench.json
+    python -m dashboard.bench --scale 1k 100k --baseline bench.json
+
+With ``--baseline`` the exit status is non-zero when any operation's
+throughput drops by more than ``--tolerance`` against the saved run. The
+same data and operations run under pytest-benchmark in
+``tests/test_benchmarks.py``.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import metrics, storage
+from .schemas import CallRecord, ClientBusinessDetails, ContactInfo, ToolActionEvent
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+AGENTS = ("ecommerce_kallix", "chiropractor_kallix", "real_estate_kallix")
+ACTION_TYPES = ("email", "brochure", "calendar_booking", "sheet_update", "crm_update")
+BATCH = 5_000
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# Filter target; every scale has at least 10 clients
+CLIENT = "client_0003"
+
+
+def _clients(n: int) -> List[ClientBusinessDetails]:
+    return [
+        ClientBusinessDetails(
+            client_id=f"client_{i:04d}",
+            business_name=f"Business {i}",
+            business_description="",
+            industry=random.Random(i).choice(["retail", "health", "property"]),
+            contact_info=ContactInfo(email=f"owner{i}@example.com", phone=f"+1555{i:07d}"),
+        )
+        for i in range(n)
+    ]
+
+
+def _calls(n: int, clients: int, seed: int) -> Iterator[CallRecord]:
+    rng = random.Random(seed)
+    for i in range(n):
+        yield CallRecord(
+            call_id=f"call_{i:08d}",
+            client_id=f"client_{rng.randrange(clients):04d}",
+            timestamp=(EPOCH + timedelta(seconds=rng.randrange(90 * 86400))).isoformat(),
+            agent_id=rng.choice(AGENTS),
+            callee=f"+1555{rng.randrange(10**7):07d}",
+            transcript=" ".join(rng.choice(("hello", "booking", "price", "thanks", "callback")) for _ in range(40)),
+            audio_url="",
+            call_status="failed" if rng.random() < 0.05 else "completed",
+            error_message=None,
+        )
+
+
+def _actions(n: int, clients: int, seed: int) -> Iterator[ToolActionEvent]:
+    rng = random.Random(seed + 1)
+    for i in range(n):
+        yield ToolActionEvent(
+            action_id=f"act_{i:08d}",
+            client_id=f"client_{rng.randrange(clients):04d}",
+            action_type=rng.choice(ACTION_TYPES),  # type: ignore[arg-type]
+            status="failed" if rng.random() < 0.1 else "success",
+            error_message=None,
+            timestamp=(EPOCH + timedelta(seconds=rng.randrange(90 * 86400))).isoformat(),
+        )
+
+
+def _batched(items: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _measure(fn: Callable[[], Any], min_seconds: float = 0.5, max_runs: int = 200) -> float:
+    """Operations per second, repeating ``fn`` until ``min_seconds`` have passed."""
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds or runs >= max_runs:
+            return runs / elapsed
+
+
+def load(backend_name: str, n: int, seed: int = 42, data_dir: Optional[Path] = None) -> Dict[str, float]:
+    """Point ``dashboard.storage`` at a fresh store holding ``n`` calls and ``n`` actions; returns insert rates."""
+    data_dir = data_dir or Path(tempfile.mkdtemp(prefix=f"kallix_bench_{backend_name}_{n}_"))
+    storage.set_backend(storage.make_backend(backend_name, data_dir))
+    clients = max(10, n // 1000)
+    results: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    storage.bulk_upsert_clients(_clients(clients))
+    for batch in _batched(_calls(n, clients, seed), BATCH):
+        storage.add_call_records(batch)
+    results["insert_calls_per_s"] = n / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for batch in _batched(_actions(n, clients, seed), BATCH):
+        storage.add_tool_actions(batch)
+    results["insert_actions_per_s"] = n / (time.perf_counter() - started)
+    return results
+
+
+def walk_cursor(pages: int = 20) -> None:
+    cursor = None
+    for _ in range(pages):
+        resp = storage.list_call_records(per_page=50, cursor=cursor)
+        cursor = resp["next_cursor"]
+        if not cursor:
+            return
+
+
+def run(backend_name: str, n: int, seed: int = 42) -> Dict[str, float]:
+    metrics.reset()
+    results = load(backend_name, n, seed)
+    client = CLIENT
+    results["list_page_per_s"] = _measure(lambda: storage.list_call_records(per_page=50))
+    results["filter_page_per_s"] = _measure(lambda: storage.list_call_records(client_id=client, per_page=50))
+    results["sort_page_per_s"] = _measure(
+        lambda: storage.list_call_records(per_page=50, sort_by="callee", sort_order="asc")
+    )
+    results["deep_offset_page_per_s"] = _measure(lambda: storage.list_call_records(page=max(1, n // 100), per_page=50))
+    results["cursor_pages_per_s"] = 20 * _measure(walk_cursor)
+    started = time.perf_counter()
+    storage.call_frame(per_page=50)
+    results["columnar_build_s"] = time.perf_counter() - started
+    results["frame_filter_sort_per_s"] = _measure(
+        lambda: storage.call_frame(client_id=client, sort_by="timestamp", sort_order="desc", per_page=50)
+    )
+    rng = random.Random(seed)
+    results["get_call_per_s"] = _measure(lambda: storage.get_call(f"call_{rng.randrange(n):08d}"))
+    storage.set_backend(None)
+    return results
+
+
+def _compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for key, ops in current.items():
+        for op, value in ops.items():
+            before = baseline.get(key, {}).get(op)
+            if before is None or not op.endswith("_per_s"):
+                continue
+            if value < before * (1 - tolerance):
+                regressions.append(f"{key} {op}: {value:,.0f} vs {before:,.0f} ({value / before - 1:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["json", "jsonl", "sqlite"], default=storage.STORAGE_BACKEND)
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["1k", "100k"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for scale in args.scale:
+        key = f"{args.backend}/{scale}"
+        results[key] = run(args.backend, SCALES[scale], args.seed)
+        print(key)
+        for op, value in results[key].items():
+            print(f"  {op:<26} {value:>14,.2f}")
+        slowest = sorted(metrics.REGISTRY.summary(), key=lambda r: r["p99_ms"], reverse=True)[:3]
+        for row in slowest:
+            print(f"  p99 {row.get('op', row['metric'])}: {row['p99_ms']} ms over {row['count']} calls")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = _compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Streaming bulk import/export of call records and tool actions.
+
+Rows flow through generators end to end: files are read lazily, validated
+and written to storage in batches, and exports stream out of the backend in
+chunks, so the dataset is never held in memory by this module.
+
+    python -m dashboard.bulk import calls history.jsonl
+    python -m dashboard.bulk export actions actions.parquet --client-id acme
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, get_args
+
+from pydantic import BaseModel, ValidationError
+
+from . import storage
+from .schemas import CallRecord, ToolActionEvent
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+# kind -> (model, bulk writer, streaming reader)
+KINDS: Dict[str, Tuple[Type[BaseModel], Callable[[Iterable[Any]], int], Callable[..., Iterator[Dict[str, Any]]]]] = {
+    "calls": (CallRecord, storage.add_call_records, storage.iter_call_records),
+    "actions": (ToolActionEvent, storage.add_tool_actions, storage.iter_tool_actions),
+}
+
+
+def detect_format(path: Path, fmt: Optional[str] = None) -> str:
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        return fmt
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix in (".csv", ".parquet"):
+        return suffix[1:]
+    raise ValueError(f"Cannot infer format from {path}; pass one of {', '.join(FORMATS)}")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError as e:
+        raise RuntimeError(f"Parquet support needs pyarrow ({e})")
+    return pa, pq
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- Readers: yield one dict per row, or the exception for a row that could not be decoded ---
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield e
+
+
+def iter_csv(path: Path, model: Type[BaseModel]) -> Iterator[Any]:
+    # CSV has no null; empty cells become None for fields that accept it
+    optional = {name for name, field in model.model_fields.items() if type(None) in get_args(field.annotation)}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield {k: (None if v == "" and k in optional else v) for k, v in row.items()}
+
+
+def iter_parquet(path: Path, batch_size: int) -> Iterator[Any]:
+    _, pq = _require_pyarrow()
+    for batch in pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def read_rows(path: Path, fmt: str, model: Type[BaseModel], batch_size: int = 1000) -> Iterator[Any]:
+    if fmt == "jsonl":
+        return iter_jsonl(path)
+    if fmt == "csv":
+        return iter_csv(path, model)
+    return iter_parquet(path, batch_size)
+
+
+# --- Writers: consume a row iterator chunk by chunk; return the number of rows written ---
+
+def write_jsonl(rows: Iterable[Dict[str, Any]], path: Path, chunk_size: int = 1000) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in _chunks(rows, chunk_size):
+            f.write("".join(json.dumps(r) + "\n" for r in chunk))
+            n += len(chunk)
+    return n
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], path: Path, fields: List[str], chunk_size: int = 1000) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for chunk in _chunks(rows, chunk_size):
+            writer.writerows(chunk)
+            n += len(chunk)
+    return n
+
+
+def write_parquet(rows: Iterable[Dict[str, Any]], path: Path, fields: List[str], chunk_size: int = 1000) -> int:
+    pa, pq = _require_pyarrow()
+    schema = pa.schema([(name, pa.string()) for name in fields])
+    n = 0
+    with pq.ParquetWriter(str(path), schema) as writer:
+        for chunk in _chunks(rows, chunk_size):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            n += len(chunk)
+    return n
+
+
+def import_records(
+    kind: str,
+    path: Path,
+    fmt: Optional[str] = None,
+    batch_size: int = 5000,
+    max_errors: int = 20,
+) -> Dict[str, Any]:
+    """Validate rows from ``path`` in batches and upsert the valid ones.
+
+    Records are keyed by their id, so re-running an import does not
+    duplicate anything. Invalid rows are skipped and reported.
+    """
+    model, add_many, _ = KINDS[kind]
+    path = Path(path)
+    rows = read_rows(path, detect_format(path, fmt), model, batch_size)
+    imported = failed = 0
+    errors: List[str] = []
+    row_no = 0
+    for chunk in _chunks(rows, batch_size):
+        valid = []
+        for row in chunk:
+            row_no += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                valid.append(model.model_validate(row))
+            except ValidationError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                    errors.append(f"row {row_no}: {detail}")
+            except ValueError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append(f"row {row_no}: {e}")
+        imported += add_many(valid)
+    return {"kind": kind, "imported": imported, "failed": failed, "errors": errors}
+
+
+def export_records(
+    kind: str,
+    path: Path,
+    fmt: Optional[str] = None,
+    client_id: Optional[str] = None,
+    chunk_size: int = 1000,
+) -> int:
+    model, _, iter_rows = KINDS[kind]
+    path = Path(path)
+    fmt = detect_format(path, fmt)
+    rows = iter_rows(client_id=client_id, batch_size=chunk_size)
+    fields = list(model.model_fields)
+    if fmt == "jsonl":
+        return write_jsonl(rows, path, chunk_size)
+    if fmt == "csv":
+        return write_csv(rows, path, fields, chunk_size)
+    return write_parquet(rows, path, fields, chunk_size)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import/export of Kallix call records and tool actions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Load records from a JSONL/CSV/Parquet file")
+    imp.add_argument("kind", choices=sorted(KINDS))
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=FORMATS)
+    imp.add_argument("--batch-size", type=int, default=5000)
+
+    exp = sub.add_parser("export", help="Write records to a JSONL/CSV/Parquet file")
+    exp.add_argument("kind", choices=sorted(KINDS))
+    exp.add_argument("path")
+    exp.add_argument("--format", choices=FORMATS)
+    exp.add_argument("--client-id")
+    exp.add_argument("--chunk-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        result = import_records(args.kind, Path(args.path), args.format, args.batch_size)
+        print(f"Imported {result['imported']} {args.kind}, {result['failed']} failed")
+        for err in result["errors"]:
+            print(f"  {err}")
+        return 1 if result["failed"] else 0
+    n = export_records(args.kind, Path(args.path), args.format, args.client_id, args.chunk_size)
+    print(f"Exported {n} {args.kind} to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
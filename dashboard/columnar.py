@@ -0,0 +1,199 @@
+"""Column-oriented, read-only snapshots of the calls and actions tables.
+
+Repeated strings (client, agent, status, action type) are dictionary
+encoded as pandas Categoricals, timestamps are int64 nanoseconds since the
+epoch (NaT for missing), and free-text ids use Arrow-backed string arrays
+when pyarrow is installed. Filters are boolean masks and sorts are stable
+argsorts over those arrays; ``frame()`` wraps the arrays in a DataFrame
+without copying them. Transcripts are not part of the snapshot (and are
+left out of the records it is built from).
+"""
+
+from __future__ import annotations
+import importlib.util
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .backends.base import TABLES
+
+CATEGORICAL: Dict[str, Tuple[str, ...]] = {
+    "calls": ("client_id", "agent_id", "call_status"),
+    "actions": ("client_id", "action_type", "status"),
+}
+TIMESTAMPS: Dict[str, Tuple[str, ...]] = {
+    "calls": ("timestamp",),
+    "actions": ("timestamp", "completed_at"),
+}
+TEXT: Dict[str, Tuple[str, ...]] = {
+    "calls": ("call_id", "callee", "audio_url", "error_message", "history_item_id"),
+    "actions": ("action_id", "error_message"),
+}
+
+STRING_DTYPE: Any = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else object
+BUILD_CHUNK = 50_000
+# Ids appended since the hashed primary-key index was built are looked up in a dict until there are this many
+PK_TAIL_MAX = 10_000
+
+
+def epoch_ns(values: List[Any]) -> np.ndarray:
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def _text(values: List[Any]) -> Any:
+    return pd.array(values, dtype=STRING_DTYPE) if STRING_DTYPE != object else np.array(values, dtype=object)
+
+
+def _concat(parts: List[Any]) -> Any:
+    # An empty part (e.g. a snapshot of an empty table) can carry a different category/string
+    # dtype than real values, which union_categoricals rejects; it contributes nothing anyway
+    parts = [p for p in parts if len(p)] or parts[:1]
+    first = parts[0]
+    if len(parts) == 1:
+        return first
+    if isinstance(first, pd.Categorical):
+        return union_categoricals(parts)
+    if isinstance(first, np.ndarray):
+        return np.concatenate(parts)
+    return type(first)._concat_same_type(parts)
+
+
+class ColumnarTable:
+    def __init__(self, table: str, columns: Dict[str, Any]):
+        self.table = table
+        self.pk = TABLES[table]
+        self.columns = columns
+        # Hash index over the first len(_pk_base) ids, plus a dict for ids appended after it
+        self._pk_base: Optional[pd.Index] = None
+        self._pk_tail: Dict[Any, int] = {}
+        # Stable full-table sort order per field; a snapshot never changes, so it is computed once
+        self._orders: Dict[str, np.ndarray] = {}
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return CATEGORICAL[self.table] + TIMESTAMPS[self.table] + TEXT[self.table]
+
+    @classmethod
+    def _from_chunk(cls, table: str, items: List[Dict[str, Any]]) -> "ColumnarTable":
+        columns: Dict[str, Any] = {}
+        for f in CATEGORICAL[table]:
+            # Missing values become "" so they filter and sort like the row backends
+            columns[f] = pd.Categorical([it.get(f) or "" for it in items])
+        for f in TIMESTAMPS[table]:
+            columns[f] = epoch_ns([it.get(f) for it in items])
+        for f in TEXT[table]:
+            columns[f] = _text([it.get(f) for it in items])
+        return cls(table, columns)
+
+    @classmethod
+    def build(cls, table: str, items: Iterable[Dict[str, Any]], chunk_size: int = BUILD_CHUNK) -> "ColumnarTable":
+        """Snapshot of ``items`` (insertion order), converted a chunk at a time to bound peak memory."""
+        parts: List[ColumnarTable] = []
+        chunk: List[Dict[str, Any]] = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                parts.append(cls._from_chunk(table, chunk))
+                chunk = []
+        if chunk or not parts:
+            parts.append(cls._from_chunk(table, chunk))
+        return cls(table, {f: _concat([p.columns[f] for p in parts]) for f in parts[0].columns})
+
+    def __len__(self) -> int:
+        return len(self.columns[self.pk])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.columns.values())
+
+    def locate(self, ids: pd.Index) -> np.ndarray:
+        """Positions of ``ids`` (-1 where absent)."""
+        if self._pk_base is None:
+            self._pk_base, self._pk_tail = pd.Index(self.columns[self.pk]), {}
+        found = self._pk_base.get_indexer(ids)
+        if self._pk_tail:
+            for i in np.flatnonzero(found < 0):
+                found[i] = self._pk_tail.get(ids[i], -1)
+        return found
+
+    def apply(self, items: List[Dict[str, Any]]) -> "ColumnarTable":
+        """A new snapshot with ``items`` inserted or replaced by primary key; ``self`` is unchanged."""
+        if not items:
+            return self
+        chunk = ColumnarTable._from_chunk(self.table, items)
+        ids = pd.Index(chunk.columns[self.pk])
+        # Within one batch the last write of an id wins
+        last = np.flatnonzero(~ids.duplicated(keep="last"))
+        n = len(self)
+        found = self.locate(ids[last])
+        appended = last[found < 0]
+        if (found < 0).all():
+            # Only new ids: one concat per column, no reordering copy
+            new = chunk.columns if len(appended) == len(ids) else {f: c.take(appended) for f, c in chunk.columns.items()}
+            result = ColumnarTable(self.table, {f: _concat([self.columns[f], new[f]]) for f in self.columns})
+        else:
+            take = np.arange(n)
+            take[found[found >= 0]] = n + last[found >= 0]
+            take = np.concatenate([take, n + appended])
+            combined = {f: _concat([self.columns[f], chunk.columns[f]]) for f in self.columns}
+            result = ColumnarTable(self.table, {f: col.take(take) for f, col in combined.items()})
+        # Existing rows keep their positions, so the hash index carries over and only new ids go in the tail
+        if len(self._pk_tail) + len(appended) <= PK_TAIL_MAX:
+            result._pk_base = self._pk_base
+            result._pk_tail = {**self._pk_tail, **{ids[i]: n + j for j, i in enumerate(appended)}}
+        return result
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        for field, value in filters.items():
+            col = self.columns.get(field)
+            if col is None:
+                raise ValueError(f"Cannot filter {self.table} on {field}")
+            if isinstance(col, pd.Categorical):
+                # Compare the small integer codes, not the strings
+                code = col.categories.get_indexer([value])[0]
+                mask &= (col.codes == code) if code >= 0 else np.zeros_like(mask)
+            elif field in TIMESTAMPS[self.table]:
+                mask &= col == epoch_ns([value])[0]
+            else:
+                mask &= pd.Series(col == value).fillna(False).to_numpy(dtype=bool)
+        return mask
+
+    def _sort_key(self, field: str) -> np.ndarray:
+        col = self.columns.get(field)
+        if col is None:
+            raise ValueError(f"Cannot sort {self.table} on {field}")
+        if isinstance(col, pd.Categorical):
+            # Rank of each category in string order, looked up through the codes
+            ranks = np.argsort(np.argsort(np.asarray(col.categories, dtype=object)))
+            return ranks[col.codes]
+        if isinstance(col, np.ndarray) and col.dtype == np.int64:
+            return col
+        return pd.Series(col).fillna("").to_numpy(dtype=object)
+
+    def positions(
+        self, filters: Dict[str, Any], sort_by: Optional[str] = None, sort_order: Optional[str] = None
+    ) -> np.ndarray:
+        """Matching row positions, ordered like ``StorageBackend.query`` (ties by insertion order, desc reversed)."""
+        if not sort_by:
+            return np.flatnonzero(self.mask(filters)) if filters else np.arange(len(self))
+        if sort_by not in self._orders:
+            self._orders[sort_by] = np.argsort(self._sort_key(sort_by), kind="stable")
+        pos = self._orders[sort_by]
+        if filters:
+            # Filtering the cached order keeps it sorted, ties still in insertion order
+            pos = pos[self.mask(filters)[pos]]
+        return pos[::-1] if sort_order == "desc" else pos
+
+    def frame(self, positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """The snapshot as a DataFrame; without ``positions`` it shares the snapshot's arrays."""
+        data: Dict[str, Any] = {}
+        for f in self.fields:
+            col = self.columns[f]
+            if positions is not None:
+                col = col.take(positions)
+            data[f] = col.view("datetime64[ns]") if f in TIMESTAMPS[self.table] else col
+        return pd.DataFrame(data, copy=False)
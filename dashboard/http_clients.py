@@ -0,0 +1,285 @@
+"""Shared, rate-limited HTTP clients for the third-party integrations.
+
+One ``httpx.Client`` per provider keeps TLS connections alive (HTTP/2 when
+the ``h2`` package is installed) instead of handshaking on every call. A
+token bucket per provider keeps us under its quota, and 429/5xx responses
+are retried with full-jitter exponential backoff, honouring Retry-After.
+
+    from dashboard.http_clients import get_client
+    resp = get_client("hubspot").post(url, headers=..., json=...)
+"""
+
+from __future__ import annotations
+import asyncio
+import atexit
+import importlib.util
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+from pydantic import BaseModel
+
+from .metrics import inc, observe
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Always safe to retry: the server did not act on the request
+RETRY_ANY_METHOD = {429, 503}
+# Retried only for idempotent methods, so a POST that may have landed is not repeated
+RETRY_IDEMPOTENT = {500, 502, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class Provider(BaseModel):
+    name: str
+    rate: float  # sustained requests per second
+    burst: int  # bucket capacity
+    timeout: float = 20.0
+    max_connections: int = 20
+    max_retries: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+
+# Rates sit a little under each provider's published per-account quota
+PROVIDERS: Dict[str, Provider] = {
+    "google": Provider(name="google", rate=9.0, burst=20),  # Calendar: 600/min per user
+    "calendly": Provider(name="calendly", rate=1.0, burst=5),
+    "hubspot": Provider(name="hubspot", rate=9.0, burst=10),  # private apps: 100 per 10s
+    "zoho": Provider(name="zoho", rate=1.5, burst=10),
+    "elevenlabs": Provider(name="elevenlabs", rate=5.0, burst=10),
+    # Call recording downloads (arbitrary hosts, larger bodies)
+    "audio": Provider(name="audio", rate=10.0, burst=20, timeout=60.0),
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        # Takes a token and returns 0, or returns how long to wait before trying again
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self) -> float:
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if not wait:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _retry_delay(provider: Provider, attempt: int, resp: Optional[httpx.Response]) -> float:
+    hinted = _retry_after(resp) if resp is not None else None
+    if hinted is not None:
+        return min(hinted, provider.max_delay)
+    return random.uniform(0, min(provider.max_delay, provider.base_delay * (2 ** attempt)))
+
+
+def _record_attempt(provider: Provider, started: float, resp: Optional[httpx.Response], error: Optional[Exception]) -> None:
+    status = str(resp.status_code) if resp is not None else type(error).__name__
+    observe("kallix_http_request_seconds", time.perf_counter() - started, provider=provider.name, status=status)
+    if resp is not None:
+        inc("kallix_http_bytes_sent_total", int(resp.request.headers.get("Content-Length") or 0), provider=provider.name)
+        inc("kallix_http_bytes_received_total", len(resp.content), provider=provider.name)
+
+
+def _should_retry(method: str, resp: Optional[httpx.Response], error: Optional[httpx.TransportError]) -> bool:
+    idempotent = method in IDEMPOTENT_METHODS
+    if error is not None:
+        # ConnectError means nothing was sent; anything later may have reached the server
+        return idempotent or isinstance(error, httpx.ConnectError)
+    assert resp is not None
+    return resp.status_code in RETRY_ANY_METHOD or (idempotent and resp.status_code in RETRY_IDEMPOTENT)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(provider: Provider) -> TokenBucket:
+    # Shared by the sync and async clients of a provider so together they stay under its quota
+    with _buckets_lock:
+        bucket = _buckets.get(provider.name)
+        if bucket is None:
+            bucket = _buckets[provider.name] = TokenBucket(provider.rate, provider.burst)
+        return bucket
+
+
+class ProviderClient:
+    """A pooled client for one provider with rate limiting and retries."""
+
+    def __init__(self, provider: Provider, transport: Optional[httpx.BaseTransport] = None):
+        self.provider = provider
+        self.bucket = get_bucket(provider)
+        self.client = httpx.Client(
+            http2=HTTP2_AVAILABLE and transport is None,
+            timeout=provider.timeout,
+            limits=httpx.Limits(
+                max_connections=provider.max_connections,
+                max_keepalive_connections=provider.max_connections,
+            ),
+            transport=transport,
+        )
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        method = method.upper()
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                resp = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                _record_attempt(self.provider, started, None, e)
+                if attempt >= self.provider.max_retries or not _should_retry(method, None, e):
+                    raise
+                delay = _retry_delay(self.provider, attempt, None)
+                logger.warning(f"{self.provider.name}: {type(e).__name__} on {method} {url}, retry in {delay:.1f}s")
+            else:
+                _record_attempt(self.provider, started, resp, None)
+                if attempt >= self.provider.max_retries or not _should_retry(method, resp, None):
+                    return resp
+                delay = _retry_delay(self.provider, attempt, resp)
+                logger.warning(f"{self.provider.name}: HTTP {resp.status_code} on {method} {url}, retry in {delay:.1f}s")
+                resp.close()
+            inc("kallix_http_retries_total", provider=self.provider.name)
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class AsyncProviderClient:
+    """Async counterpart of :class:`ProviderClient` for concurrent fan-out (one per event loop).
+
+    Use as ``async with AsyncProviderClient(PROVIDERS["elevenlabs"]) as client``.
+    """
+
+    def __init__(self, provider: Provider, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.provider = provider
+        self.bucket = get_bucket(provider)
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE and transport is None,
+            timeout=provider.timeout,
+            limits=httpx.Limits(
+                max_connections=provider.max_connections,
+                max_keepalive_connections=provider.max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        method = method.upper()
+        attempt = 0
+        while True:
+            await self.bucket.acquire_async()
+            started = time.perf_counter()
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                _record_attempt(self.provider, started, None, e)
+                if attempt >= self.provider.max_retries or not _should_retry(method, None, e):
+                    raise
+                delay = _retry_delay(self.provider, attempt, None)
+                logger.warning(f"{self.provider.name}: {type(e).__name__} on {method} {url}, retry in {delay:.1f}s")
+            else:
+                _record_attempt(self.provider, started, resp, None)
+                if attempt >= self.provider.max_retries or not _should_retry(method, resp, None):
+                    return resp
+                delay = _retry_delay(self.provider, attempt, resp)
+                logger.warning(f"{self.provider.name}: HTTP {resp.status_code} on {method} {url}, retry in {delay:.1f}s")
+                await resp.aclose()
+            inc("kallix_http_retries_total", provider=self.provider.name)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def __aenter__(self) -> "AsyncProviderClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.client.aclose()
+
+
+_clients: Dict[str, ProviderClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name: str) -> ProviderClient:
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = ProviderClient(PROVIDERS[name])
+    return client
+
+
+def set_client(name: str, client: Optional[ProviderClient]) -> None:
+    # Swap in a client (e.g. one with a stub transport); None drops back to the default
+    with _clients_lock:
+        old = _clients.pop(name, None)
+        if client is not None:
+            _clients[name] = client
+    if old is not None and old is not client:
+        old.close()
+
+
+@atexit.register
+def close_all() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -1,11 +1,24 @@
 from __future__ import annotations
 import os
-from typing import Dict, Optional
-import requests
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from . import sheets
+from .http_clients import get_client
+from .metrics import timed
 from .schemas import ToolActionEvent
+from .storage import DATA_DIR
+from .sync_ledger import SyncLedger, record_key
 from .utils import generate_id, now_iso
 
+# Overridable so the API paths can be pointed at a local stub (see tests/crm_stub.py, tests/elevenlabs_stub.py)
+HUBSPOT_API_BASE = os.getenv("HUBSPOT_API_BASE", "https://api.hubapi.com")
+ZOHO_API_BASE = os.getenv("ZOHO_API_BASE", "https://www.zohoapis.com")
+ELEVENLABS_API_BASE = os.getenv("ELEVENLABS_API_BASE", "https://api.elevenlabs.io")
+CRM_BATCH_SIZE = 100  # max records per batch request for both HubSpot and Zoho
+CRM_LEDGER_FILE = DATA_DIR / "crm_sync.sqlite3"
+
+_crm_ledger: Optional[SyncLedger] = None
+
 
 def _event(client_id: str, action_type: str, ok: bool, error: Optional[str]) -> Dict:
     return ToolActionEvent(
@@ -18,6 +31,7 @@ def _event(client_id: str, action_type: str, ok: bool, error: Optional[str]) ->
     ).model_dump()
 
 
+@timed("integration")
 def fetch_elevenlabs_transcript_and_audio(history_item_id: str, api_key: Optional[str]) -> Dict[str, Optional[str]]:
     # Purpose: Fetch transcript and audio URL from Eleven Labs; inputs: history_item_id, api_key
     if not api_key:
@@ -26,8 +40,8 @@ def fetch_elevenlabs_transcript_and_audio(history_item_id: str, api_key: Optiona
         headers = {"xi-api-key": api_key}
         # Note: Endpoint paths may change; this is a placeholder.
         # History details
-        hist = requests.get(
-            f"https://api.elevenlabs.io/v1/history/{history_item_id}", headers=headers, timeout=15
+        hist = get_client("elevenlabs").get(
+            f"{ELEVENLABS_API_BASE}/v1/history/{history_item_id}", headers=headers, timeout=15
         )
         hist.raise_for_status()
         data = hist.json()
@@ -38,12 +52,13 @@ def fetch_elevenlabs_transcript_and_audio(history_item_id: str, api_key: Optiona
         return {"transcript": None, "audio_url": None, "error": str(e)}
 
 
+@timed("integration")
 def book_google_calendar_event(client_id: str, token: Optional[str], calendar_id: str, event_payload: Dict) -> Dict:
     # Purpose: Create event in Google Calendar; inputs: oauth token, calendar_id, event payload
     if not token:
         return _event(client_id, "calendar_booking", False, "Missing GOOGLE_OAUTH_TOKEN")
     try:
-        resp = requests.post(
+        resp = get_client("google").post(
             f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
             headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
             json=event_payload,
@@ -56,12 +71,13 @@ def book_google_calendar_event(client_id: str, token: Optional[str], calendar_id
         return _event(client_id, "calendar_booking", False, str(e))
 
 
+@timed("integration")
 def create_calendly_invite(client_id: str, scheduling_link: str, invitee: Dict[str, str], token: Optional[str]) -> Dict:
     # Purpose: Schedule via Calendly; inputs: scheduling link, invitee(name,email), token
     if not token:
         return _event(client_id, "calendar_booking", False, "Missing CALENDLY_API_TOKEN")
     try:
-        resp = requests.post(
+        resp = get_client("calendly").post(
             "https://api.calendly.com/scheduled_events",
             headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
             json={"scheduling_link": scheduling_link, "invitee": invitee},
@@ -74,6 +90,7 @@ def create_calendly_invite(client_id: str, scheduling_link: str, invitee: Dict[s
         return _event(client_id, "calendar_booking", False, str(e))
 
 
+@timed("integration")
 def send_email_action(client_id: str, to_email: str, subject: str, content: str) -> Dict:
     # Purpose: Send an email; inputs: SMTP creds (env), to, subject, content
     # Demo stub: Only logs the action; implement SMTP if creds provided.
@@ -89,6 +106,7 @@ def send_email_action(client_id: str, to_email: str, subject: str, content: str)
         return _event(client_id, "email", False, str(e))
 
 
+@timed("integration")
 def send_brochure_action(client_id: str, filename: str, bytes_len: int) -> Dict:
     # Purpose: Send brochure to prospect; inputs: file name and bytes length
     # Demo: assume success if bytes_len > 0
@@ -97,29 +115,85 @@ def send_brochure_action(client_id: str, filename: str, bytes_len: int) -> Dict:
     return _event(client_id, "brochure", ok, err)
 
 
+@timed("integration")
 def update_google_sheet(client_id: str, sheet_id: str, range_a1: str, values: list) -> Dict:
     # Purpose: Update Google Sheet; inputs: service account JSON env, sheet_id, range, values
     try:
-        sa_path = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-        if not sa_path or not os.path.exists(sa_path):
+        if not sheets.service_account_path():
             return _event(client_id, "sheet_update", False, "Missing GOOGLE_SERVICE_ACCOUNT_JSON")
-        import gspread  # type: ignore
-        from google.oauth2.service_account import Credentials  # type: ignore
-
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds = Credentials.from_service_account_file(sa_path, scopes=scopes)
-        gc = gspread.authorize(creds)
-        sh = gc.open_by_key(sheet_id)
-        ws = sh.sheet1
-        ws.update(range_a1, values)
+        ws = sheets.open_spreadsheet(sheet_id).sheet1
+        ws.update(values=values, range_name=range_a1)
         return _event(client_id, "sheet_update", True, None)
     except Exception as e:
+        sheets.invalidate(sheet_id)
         return _event(client_id, "sheet_update", False, str(e))
 
 
+class SheetBatch:
+    """Collects sheet writes and sends them with one API call per spreadsheet/worksheet.
+
+    Range updates for a spreadsheet go out in a single ``values_batch_update``;
+    appended rows for a worksheet go out in a single ``append_rows``. Use as a
+    context manager (flushes on exit) or call :meth:`flush`; ``events`` holds one
+    ToolActionEvent dict per API call made.
+    """
+
+    def __init__(self, client_id: str, max_rows: int = 1000):
+        self.client_id = client_id
+        self.max_rows = max_rows
+        self.events: List[Dict] = []
+        self._updates: Dict[str, List[Dict]] = {}
+        self._appends: Dict[Tuple[str, Optional[str]], List[list]] = {}
+        self._rows = 0
+
+    def update(self, sheet_id: str, range_a1: str, values: list) -> None:
+        self._updates.setdefault(sheet_id, []).append({"range": range_a1, "values": values})
+        self._added(len(values))
+
+    def append(self, sheet_id: str, rows: list, worksheet: Optional[str] = None) -> None:
+        self._appends.setdefault((sheet_id, worksheet), []).extend(rows)
+        self._added(len(rows))
+
+    def _added(self, n: int) -> None:
+        self._rows += n
+        if self._rows >= self.max_rows:
+            self.flush()
+
+    def _write(self, sheet_id: str, fn) -> None:
+        try:
+            if not sheets.service_account_path():
+                raise RuntimeError("Missing GOOGLE_SERVICE_ACCOUNT_JSON")
+            fn(sheets.open_spreadsheet(sheet_id))
+            self.events.append(_event(self.client_id, "sheet_update", True, None))
+        except Exception as e:
+            sheets.invalidate(sheet_id)
+            self.events.append(_event(self.client_id, "sheet_update", False, f"{sheet_id}: {e}"))
+
+    @timed("integration")
+    def flush(self) -> List[Dict]:
+        updates, appends = self._updates, self._appends
+        self._updates, self._appends, self._rows = {}, {}, 0
+        start = len(self.events)
+        for sheet_id, data in updates.items():
+            body = {"valueInputOption": "USER_ENTERED", "data": data}
+            self._write(sheet_id, lambda sh: sh.values_batch_update(body))
+        for (sheet_id, worksheet), rows in appends.items():
+            self._write(
+                sheet_id,
+                lambda sh: (sh.worksheet(worksheet) if worksheet else sh.sheet1).append_rows(
+                    rows, value_input_option="USER_ENTERED"
+                ),
+            )
+        return self.events[start:]
+
+    def __enter__(self) -> "SheetBatch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+
+@timed("integration")
 def update_crm(client_id: str, crm: str, payload: Dict) -> Dict:
     # Purpose: Update CRM (Zoho/HubSpot); inputs: crm type, auth token env, payload
     try:
@@ -127,8 +201,8 @@ def update_crm(client_id: str, crm: str, payload: Dict) -> Dict:
             token = os.getenv("ZOHO_OAUTH_TOKEN")
             if not token:
                 return _event(client_id, "crm_update", False, "Missing ZOHO_OAUTH_TOKEN")
-            resp = requests.post(
-                "https://www.zohoapis.com/crm/v2/Leads",
+            resp = get_client("zoho").post(
+                f"{ZOHO_API_BASE}/crm/v2/Leads",
                 headers={"Authorization": f"Zoho-oauthtoken {token}"},
                 json=payload,
                 timeout=20,
@@ -137,8 +211,8 @@ def update_crm(client_id: str, crm: str, payload: Dict) -> Dict:
             token = os.getenv("HUBSPOT_PRIVATE_APP_TOKEN")
             if not token:
                 return _event(client_id, "crm_update", False, "Missing HUBSPOT_PRIVATE_APP_TOKEN")
-            resp = requests.post(
-                "https://api.hubapi.com/crm/v3/objects/contacts",
+            resp = get_client("hubspot").post(
+                f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts",
                 headers={"Authorization": f"Bearer {token}"},
                 json=payload,
                 timeout=20,
@@ -151,3 +225,122 @@ def update_crm(client_id: str, crm: str, payload: Dict) -> Dict:
     except Exception as e:
         return _event(client_id, "crm_update", False, str(e))
 
+
+# (ok, remote record id, error) per record, in input order
+_RecordResult = Tuple[bool, Optional[str], Optional[str]]
+
+
+def _crm_token(crm: str) -> Tuple[Optional[str], str]:
+    env = "ZOHO_OAUTH_TOKEN" if crm == "zoho" else "HUBSPOT_PRIVATE_APP_TOKEN"
+    return os.getenv(env), env
+
+
+def _hubspot_properties(payload: Dict) -> Dict:
+    # Accept either a bare property dict or the API's {"properties": {...}} shape
+    return payload["properties"] if isinstance(payload.get("properties"), dict) else payload
+
+
+def _send_hubspot_batch(token: str, records: List[Dict]) -> List[_RecordResult]:
+    # objectWriteTraceId ties each result/error back to its input, since results come back unordered
+    inputs = [{"properties": _hubspot_properties(p), "objectWriteTraceId": str(n)} for n, p in enumerate(records)]
+    resp = get_client("hubspot").post(
+        f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/batch/create",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"inputs": inputs},
+        timeout=60,
+    )
+    if resp.status_code not in (200, 201, 207):
+        return [(False, None, f"HTTP {resp.status_code}: {resp.text[:200]}")] * len(records)
+    body = resp.json()
+    errors = body.get("errors") or []
+    default: _RecordResult = (True, None, None) if not errors else (False, None, "No result returned for record")
+    out = [default] * len(records)
+    for r in body.get("results") or []:
+        trace = str(r.get("objectWriteTraceId", ""))
+        if trace.isdigit() and int(trace) < len(out):
+            out[int(trace)] = (True, r.get("id"), None)
+    for e in errors:
+        for trace in (e.get("context") or {}).get("objectWriteTraceId") or []:
+            if str(trace).isdigit() and int(trace) < len(out):
+                out[int(trace)] = (False, None, e.get("message") or "Rejected by HubSpot")
+    return out
+
+
+def _send_zoho_batch(token: str, records: List[Dict]) -> List[_RecordResult]:
+    resp = get_client("zoho").post(
+        f"{ZOHO_API_BASE}/crm/v2/Leads",
+        headers={"Authorization": f"Zoho-oauthtoken {token}"},
+        json={"data": records},
+        timeout=60,
+    )
+    if resp.status_code not in (200, 201, 202, 207):
+        return [(False, None, f"HTTP {resp.status_code}: {resp.text[:200]}")] * len(records)
+    # Zoho answers with one entry per record, in request order
+    data = resp.json().get("data") or []
+    out: List[_RecordResult] = []
+    for n in range(len(records)):
+        item = data[n] if n < len(data) else {}
+        if item.get("status") == "success":
+            out.append((True, (item.get("details") or {}).get("id"), None))
+        else:
+            out.append((False, None, f"{item.get('code', 'ERROR')}: {item.get('message', 'no result returned')}"))
+    return out
+
+
+def _get_crm_ledger() -> SyncLedger:
+    global _crm_ledger
+    if _crm_ledger is None:
+        _crm_ledger = SyncLedger(CRM_LEDGER_FILE)
+    return _crm_ledger
+
+
+@timed("integration")
+def bulk_update_crm(
+    client_id: str,
+    crm: str,
+    payloads: Iterable[Dict],
+    ledger: Optional[SyncLedger] = None,
+) -> List[Dict]:
+    # Purpose: Sync many records through the CRM batch endpoints; inputs: crm type, auth token env, payloads
+    # Returns one event per payload, in order. Records the ledger has seen before
+    # (same email, or same content) are skipped rather than created twice; repeats
+    # within the call are sent once and share the first copy's outcome.
+    payloads = list(payloads)
+    if crm not in ("zoho", "hubspot"):
+        return [_event(client_id, "crm_update", False, f"Unsupported CRM: {crm}") for _ in payloads]
+    token, env = _crm_token(crm)
+    if not token:
+        return [_event(client_id, "crm_update", False, f"Missing {env}") for _ in payloads]
+    ledger = ledger or _get_crm_ledger()
+    send = _send_zoho_batch if crm == "zoho" else _send_hubspot_batch
+
+    keys = [record_key(_hubspot_properties(p) if crm == "hubspot" else p) for p in payloads]
+    already = ledger.synced(crm, client_id, list(set(keys)))
+    events: List[Optional[Dict]] = [None] * len(payloads)
+    todo: Dict[str, int] = {}
+    repeats: Dict[int, int] = {}
+    for i, key in enumerate(keys):
+        if key in already:
+            events[i] = _event(client_id, "crm_update", True, None)
+        elif key in todo:
+            repeats[i] = todo[key]
+        else:
+            todo[key] = i
+
+    pending = list(todo.items())
+    for start in range(0, len(pending), CRM_BATCH_SIZE):
+        batch = pending[start : start + CRM_BATCH_SIZE]
+        try:
+            results = send(token, [payloads[i] for _, i in batch])
+        except Exception as e:
+            results = [(False, None, str(e))] * len(batch)
+        synced = []
+        for (key, i), (ok, remote_id, err) in zip(batch, results):
+            events[i] = _event(client_id, "crm_update", ok, err)
+            if ok:
+                synced.append((key, remote_id))
+        if synced:
+            ledger.mark(crm, client_id, synced)
+    for i, first in repeats.items():
+        events[i] = _event(client_id, "crm_update", events[first]["status"] == "success", events[first]["error_message"])
+    return events  # type: ignore[return-value]
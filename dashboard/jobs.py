@@ -0,0 +1,88 @@
+"""Background runner for integration actions.
+
+``submit_action`` records a ``pending`` ToolActionEvent straight away and runs
+the integration call on a thread pool. When the call returns, the same event
+(same action_id) is rewritten as ``success`` or ``failed``, so the Action Logs
+table shows each job's status as it changes and the Streamlit run never
+waits on a third-party API.
+"""
+
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from loguru import logger
+
+from .schemas import ToolActionEvent
+from .storage import add_tool_action, update_tool_action
+from .utils import generate_id, now_iso
+
+JOB_WORKERS = int(os.getenv("KALLIX_JOB_WORKERS", "8"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_in_flight: Set[Future] = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="kallix-job")
+        return _executor
+
+
+def _run(pending: ToolActionEvent, fn: Callable[..., Dict[str, Any]], args: tuple, kwargs: dict) -> Dict[str, Any]:
+    # Integration helpers return an event dict of their own; only its outcome is carried over
+    try:
+        result = fn(*args, **kwargs)
+        status, error = result.get("status", "failed"), result.get("error_message")
+    except Exception as e:
+        logger.exception(f"Job {pending.action_id} ({pending.action_type}) raised")
+        status, error = "failed", str(e)
+    done = pending.model_copy(update={"status": status, "error_message": error, "completed_at": now_iso()})
+    update_tool_action(done)
+    return done.model_dump()
+
+
+def submit_action(
+    client_id: str,
+    action_type: str,
+    fn: Callable[..., Dict[str, Any]],
+    *args: Any,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Log a pending action, run ``fn(*args, **kwargs)`` in the background and return the pending event."""
+    pending = ToolActionEvent(
+        action_id=generate_id("act"),
+        client_id=client_id,
+        action_type=action_type,  # type: ignore
+        status="pending",
+        error_message=None,
+        timestamp=now_iso(),
+    )
+    add_tool_action(pending)
+    submit(_run, pending, fn, args, kwargs)
+    return pending.model_dump()
+
+
+def submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run any callable on the job pool; it counts towards ``in_flight`` until done."""
+    future = _get_executor().submit(fn, *args, **kwargs)
+    with _lock:
+        _in_flight.add(future)
+    future.add_done_callback(_forget)
+    return future
+
+
+def _forget(future: Future) -> None:
+    with _lock:
+        _in_flight.discard(future)
+
+
+def in_flight() -> int:
+    """Jobs submitted from this process that have not finished yet."""
+    with _lock:
+        return len(_in_flight)
@@ -0,0 +1,247 @@
+"""In-process metrics for storage and integration calls.
+
+Latency histograms, byte counters and record counters, rendered in the
+Prometheus text exposition format by ``render()`` (and served on
+``/metrics`` by ``start_http_server``). Storage and integration functions
+are wrapped with ``@timed(...)``; the backends and HTTP clients count
+bytes themselves, since only they see the serialized data.
+"""
+
+from __future__ import annotations
+import bisect
+import functools
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+# Seconds; spans an in-memory lookup up to a slow third-party API call
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+HELP: Dict[str, str] = {
+    "kallix_storage_op_seconds": "Latency of dashboard.storage functions",
+    "kallix_storage_records_total": "Records written or returned by dashboard.storage functions",
+    "kallix_storage_bytes_read_total": "Serialized bytes read by the storage backends",
+    "kallix_storage_bytes_written_total": "Serialized bytes written by the storage backends",
+    "kallix_integration_call_seconds": "Latency of dashboard.integrations calls",
+    "kallix_integration_records_total": "Records handled by dashboard.integrations calls",
+    "kallix_http_request_seconds": "Latency of single outbound HTTP attempts, by provider and status",
+    "kallix_http_bytes_sent_total": "Request body bytes sent to third-party APIs",
+    "kallix_http_bytes_received_total": "Response body bytes received from third-party APIs",
+    "kallix_http_retries_total": "Outbound HTTP attempts that were retried",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def format_value(value: float) -> str:
+    """A sample value in the text format: integers in full (``{:g}`` would round 1234567 to 1.23457e+06)."""
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum}")
+                    lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+            for name, counters in sorted(self.counters.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+                for labels, value in sorted(counters.items()):
+                    lines.append(f"{name}{_fmt_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per histogram series with count and p50/p95/p99 in milliseconds."""
+        with self._lock:
+            return [
+                {
+                    "metric": name,
+                    **dict(labels),
+                    "count": hist.count,
+                    "p50_ms": round(hist.quantile(0.5) * 1000, 3),
+                    "p95_ms": round(hist.quantile(0.95) * 1000, 3),
+                    "p99_ms": round(hist.quantile(0.99) * 1000, 3),
+                    "total_s": round(hist.sum, 3),
+                }
+                for name, series in sorted(self.histograms.items())
+                for labels, hist in sorted(series.items())
+            ]
+
+    def counter_rows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"metric": name, **dict(labels), "value": value}
+                for name, series in sorted(self.counters.items())
+                for labels, value in sorted(series.items())
+            ]
+
+
+REGISTRY = Registry()
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+render = REGISTRY.render
+reset = REGISTRY.reset
+
+
+def _record_count(result: Any) -> Optional[int]:
+    if isinstance(result, bool) or result is None:
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return len(result["items"]) if isinstance(result.get("items"), list) else 1
+    if isinstance(result, tuple) and result and hasattr(result[0], "__len__"):
+        return len(result[0])  # (frame, total)
+    return None
+
+
+def _counted(items: Iterator[Any], component: str, op: str) -> Iterator[Any]:
+    n = 0
+    try:
+        for item in items:
+            n += 1
+            yield item
+    finally:
+        inc(f"kallix_{component}_records_total", n, op=op)
+
+
+def timed(component: str) -> Callable[[F], F]:
+    """Record latency (by outcome: ok, failed or error) and record counts under ``kallix_<component>_*``.
+
+    Iterators are passed through and counted as they are consumed; their
+    latency is only the time to start them.
+    """
+    seconds = {"storage": "kallix_storage_op_seconds"}.get(component, f"kallix_{component}_call_seconds")
+
+    def decorate(fn: F) -> F:
+        op = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                observe(seconds, time.perf_counter() - started, op=op, outcome="error")
+                raise
+            # Integrations report failures as a failed event rather than raising
+            failed = isinstance(result, dict) and result.get("status") == "failed"
+            observe(seconds, time.perf_counter() - started, op=op, outcome="failed" if failed else "ok")
+            if isinstance(result, Iterator):
+                return _counted(result, component, op)
+            n = _record_count(result)
+            if n is not None:
+                inc(f"kallix_{component}_records_total", n, op=op)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # keep the console quiet
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread (for a Prometheus scraper next to the dashboard)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="kallix-metrics").start()
+    return server
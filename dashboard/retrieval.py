@@ -0,0 +1,248 @@
+"""Chunked knowledge-base retrieval for use inside a live call turn.
+
+KB entry values are split into overlapping chunks that remember their
+character offsets in the original entry. Chunk vectors live in one
+float32 matrix per client, so ``retrieve`` is a single matrix-vector
+product plus a partial sort. The embedding function is pluggable; the
+default is a local feature-hashing embedder with no model download.
+
+    from dashboard.retrieval import retrieve
+    retrieve("acme", "what are your opening hours", k=3)
+"""
+
+from __future__ import annotations
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from . import storage
+from .backends.fulltext import tokenize
+from .schemas import KBChunk
+
+# texts -> (len(texts), dim) float array; rows need not be normalized
+EmbedFn = Callable[[Sequence[str]], np.ndarray]
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 200
+
+# Entry types whose value is a reference rather than content
+SKIP_TYPES = {"drive_link"}
+# Entries fetched per storage query while a partition catches up
+CATCH_UP_BATCH = 1000
+
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+    """``(start, end)`` character spans of overlapping chunks, cut on whitespace where possible."""
+    spans: List[Tuple[int, int]] = []
+    n = len(text)
+    start = 0
+    while start < n:
+        while start < n and text[start].isspace():
+            start += 1
+        if start >= n:
+            break
+        end = min(n, start + size)
+        if end < n:
+            cut = text.rfind(" ", start + size // 2, end)
+            if cut > start:
+                end = cut
+        spans.append((start, end))
+        if end >= n:
+            break
+        # Step back by the overlap, then forward to the next word so chunks don't open mid-word
+        nxt = max(end - overlap, start + 1)
+        if not text[nxt - 1].isspace():
+            space = text.find(" ", nxt, end)
+            if space != -1:
+                nxt = space + 1
+        start = nxt
+    return spans
+
+
+class HashingEmbedder:
+    """Signed feature hashing of word unigrams and bigrams into ``dim`` buckets."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = tokenize(text)
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        # Sublinear term frequency so one repeated word can't dominate a chunk
+        return np.sign(out) * np.log1p(np.abs(out))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Partition:
+    # One client's chunks; the matrix grows by doubling so appends are amortized O(1)
+    def __init__(self, dim: int):
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.n = 0
+        self.chunks: List[KBChunk] = []
+        self.entry_ids: Set[str] = set()
+        # storage.kb_signature() as of the last catch-up, and the storage key of the last entry read
+        self.signature: Optional[Tuple[int, Optional[str]]] = None
+        self.after: Optional[Tuple[Any, int]] = None
+
+    def add(self, chunks: List[KBChunk], vectors: np.ndarray) -> None:
+        need = self.n + len(chunks)
+        if need > len(self.matrix):
+            grown = np.zeros((max(need, 2 * len(self.matrix), 64), self.matrix.shape[1]), dtype=np.float32)
+            grown[: self.n] = self.matrix[: self.n]
+            self.matrix = grown
+        self.matrix[self.n : need] = vectors
+        self.chunks.extend(chunks)
+        self.n = need
+
+
+class KBRetriever:
+    """Per-client chunk matrices, built lazily from storage on first use.
+
+    Each query compares the client's ``storage.kb_signature`` with the one
+    its partition was built at; when it moved, only entries stored after the
+    last one read (here or by another process) are fetched, chunked and
+    embedded before the search.
+    """
+
+    def __init__(
+        self,
+        embed: Optional[EmbedFn] = None,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+    ):
+        self.embed = embed or HashingEmbedder()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._dim: Optional[int] = None
+        self._partitions: Dict[str, _Partition] = {}
+        self._lock = threading.RLock()
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = _normalize(self.embed(texts))
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+        return vectors
+
+    def _chunks(self, entry: Dict[str, Any]) -> List[KBChunk]:
+        value = entry.get("value") or ""
+        return [
+            KBChunk(
+                chunk_id=f"{entry['kb_entry_id']}:{i}",
+                kb_entry_id=entry["kb_entry_id"],
+                client_id=entry["client_id"],
+                text=value[start:end],
+                start=start,
+                end=end,
+            )
+            for i, (start, end) in enumerate(chunk_text(value, self.chunk_size, self.chunk_overlap))
+        ]
+
+    def _add_entries(self, part: _Partition, entries: Iterable[Dict[str, Any]]) -> int:
+        chunks: List[KBChunk] = []
+        for entry in entries:
+            if entry["kb_entry_id"] in part.entry_ids:
+                continue
+            part.entry_ids.add(entry["kb_entry_id"])
+            if entry.get("type") not in SKIP_TYPES:
+                chunks.extend(self._chunks(entry))
+        if chunks:
+            part.add(chunks, self._embed([c.text for c in chunks]))
+        return len(chunks)
+
+    def _partition(self, client_id: str) -> _Partition:
+        signature = storage.kb_signature(client_id)
+        part = self._partitions.get(client_id)
+        if part is not None and part.signature == signature:
+            return part
+        with self._lock:
+            part = self._partitions.get(client_id)
+            # Entries are only ever added, so fewer than before means the KB was replaced
+            if part is None or part.signature is None or signature[0] < part.signature[0]:
+                if self._dim is None:
+                    self._embed([""])
+                part = _Partition(self._dim)  # type: ignore[arg-type]
+                self._partitions[client_id] = part
+            while part.signature != signature:
+                entries, part.after = storage.kb_entries_after(client_id, part.after, CATCH_UP_BATCH)
+                self._add_entries(part, entries)
+                if len(entries) < CATCH_UP_BATCH:
+                    part.signature = signature
+        return part
+
+    def index_entry(self, entry: Dict[str, Any]) -> int:
+        """Add a newly saved KB entry now rather than at the next query; returns the number of chunks it added."""
+        client_id = entry["client_id"]
+        with self._lock:
+            part = self._partitions.get(client_id)
+            if part is None:
+                # Nothing cached for this client yet: build from storage, which already holds the entry
+                self._partition(client_id)
+                return 0
+            if entry["kb_entry_id"] in part.entry_ids:
+                return 0
+            added = self._add_entries(part, [entry])
+            # Count the entry's own write in the signature so the next query needn't read storage;
+            # anything else written meanwhile leaves the count off and still triggers a catch-up
+            count, newest = part.signature or (0, None)
+            part.signature = (count + 1, max(newest or "", entry.get("created_at") or "") or None)
+            return added
+
+    def refresh(self, client_id: Optional[str] = None) -> None:
+        """Drop cached partitions (e.g. after another process wrote entries); rebuilt on next use."""
+        with self._lock:
+            if client_id is None:
+                self._partitions.clear()
+            else:
+                self._partitions.pop(client_id, None)
+
+    def retrieve(self, client_id: str, query: str, k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Top ``k`` chunks of this client's KB by cosine similarity to ``query``, best first."""
+        part = self._partition(client_id)
+        with self._lock:
+            matrix, chunks, n = part.matrix, part.chunks, part.n
+        if n == 0 or k <= 0:
+            return []
+        scores = matrix[:n] @ self._embed([query])[0]
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [{**chunks[i].model_dump(), "score": float(scores[i])} for i in top if scores[i] > min_score]
+
+
+_retriever: Optional[KBRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> KBRetriever:
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = KBRetriever()
+    return _retriever
+
+
+def set_retriever(retriever: Optional[KBRetriever]) -> None:
+    # Swap in a retriever with another embedding function; None resets to the default
+    global _retriever
+    _retriever = retriever
+
+
+def index_entry(entry: Dict[str, Any]) -> int:
+    return get_retriever().index_entry(entry)
+
+
+def retrieve(client_id: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    return get_retriever().retrieve(client_id, query, k)
@@ -0,0 +1,130 @@
+"""Hourly count rollups for calls and tool actions, kept next to the data.
+
+Every write to ``calls``/``actions`` bumps a counter keyed by
+``(kind, client_id, dim, status, hour)`` where ``dim`` is the agent for calls
+and the action type for actions. A per-record index remembers which bucket
+each record was counted in, so re-imports are no-ops and an action moving
+from "pending" to "success" moves its count instead of adding one. Reading
+a time window only touches the (small) rollup table, however long the
+history is.
+"""
+
+from __future__ import annotations
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROLLUP_FILE_NAME = "analytics.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    kind TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    dim TEXT NOT NULL,
+    status TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (kind, client_id, dim, status, hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollups_hour ON rollups (kind, hour);
+CREATE TABLE IF NOT EXISTS members (
+    kind TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    dim TEXT NOT NULL,
+    status TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    PRIMARY KEY (kind, record_id)
+) WITHOUT ROWID;
+"""
+
+# (record_id, client_id, dim, status, iso timestamp)
+RollupRow = Tuple[str, str, str, str, str]
+
+
+def hour_buckets(timestamps: Sequence[str]) -> np.ndarray:
+    """Hours since the epoch (UTC) for ISO timestamps; naive ones are taken as UTC, bad ones map to 0."""
+    parsed = pd.to_datetime(pd.Series(list(timestamps), dtype=object), utc=True, errors="coerce", format="ISO8601")
+    hours = parsed.to_numpy(dtype="datetime64[h]").astype("int64")
+    return np.where(parsed.isna().to_numpy(), 0, hours)
+
+
+class RollupStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.created = not self.path.exists()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, kind: str, rows: Iterable[RollupRow]) -> int:
+        """Counts (or re-buckets) records; returns how many buckets changed."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        hours = hour_buckets([r[4] for r in rows])
+        changed = 0
+        with self._lock:
+            # IMMEDIATE so concurrent processes serialise their read-modify-write
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for (record_id, client_id, dim, status, _), hour in zip(rows, hours.tolist()):
+                    new = (client_id or "", dim or "", status or "", hour)
+                    old = self._conn.execute(
+                        "SELECT client_id, dim, status, hour FROM members WHERE kind = ? AND record_id = ?",
+                        (kind, record_id),
+                    ).fetchone()
+                    if old == new:
+                        continue
+                    if old is not None:
+                        self._conn.execute(
+                            "UPDATE rollups SET n = n - 1 WHERE kind = ? AND client_id = ? AND dim = ? AND status = ? AND hour = ?",
+                            (kind, *old),
+                        )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO members (kind, record_id, client_id, dim, status, hour) VALUES (?, ?, ?, ?, ?, ?)",
+                        (kind, record_id, *new),
+                    )
+                    self._conn.execute(
+                        "INSERT INTO rollups (kind, client_id, dim, status, hour, n) VALUES (?, ?, ?, ?, ?, 1) "
+                        "ON CONFLICT (kind, client_id, dim, status, hour) DO UPDATE SET n = n + 1",
+                        (kind, *new),
+                    )
+                    changed += 1
+                self._conn.execute("DELETE FROM rollups WHERE kind = ? AND n <= 0", (kind,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def reset(self, kind: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM rollups WHERE kind = ?", (kind,))
+            self._conn.execute("DELETE FROM members WHERE kind = ?", (kind,))
+            self._conn.execute("COMMIT")
+
+    def frame(self, kind: str, client_id: Optional[str] = None, since_hour: Optional[int] = None) -> pd.DataFrame:
+        """Rollup rows as a DataFrame with columns client_id, dim, status, hour, n."""
+        sql = "SELECT client_id, dim, status, hour, n FROM rollups WHERE kind = ?"
+        params: List[object] = [kind]
+        if since_hour is not None:
+            sql += " AND hour >= ?"
+            params.append(int(since_hour))
+        if client_id:
+            sql += " AND client_id = ?"
+            params.append(client_id)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        df = pd.DataFrame(rows, columns=["client_id", "dim", "status", "hour", "n"])
+        return df.astype({"hour": "int64", "n": "int64"})
+
+    def close(self) -> None:
+        self._conn.close()
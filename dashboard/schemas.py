@@ -27,6 +27,15 @@ class KnowledgeBaseEntry(BaseModel):
     created_at: str  # ISO8601 timestamp
 
 
+class KBChunk(BaseModel):
+    chunk_id: str  # "<kb_entry_id>:<n>"
+    kb_entry_id: str
+    client_id: str
+    text: str
+    start: int  # character offsets into the entry's value
+    end: int
+
+
 class CallRecord(BaseModel):
     call_id: str
     client_id: str
@@ -37,6 +46,7 @@ class CallRecord(BaseModel):
     audio_url: str
     call_status: Literal["completed", "failed"]
     error_message: Optional[str]
+    history_item_id: Optional[str] = None  # ElevenLabs history item the record came from
 
 
 class ToolActionEvent(BaseModel):
@@ -49,9 +59,19 @@ class ToolActionEvent(BaseModel):
         "sheet_update",
         "crm_update",
     ]
-    status: Literal["success", "failed"]
+    status: Literal["pending", "success", "failed"]
     error_message: Optional[str]
     timestamp: str  # ISO8601 timestamp
+    completed_at: Optional[str] = None  # set when a background job finishes
+
+
+class PdfExtractionResult(BaseModel):
+    sha256: str  # of the PDF bytes; the cache key
+    ok: bool
+    text: str = ""
+    pages: int = 0  # pages extracted (0 on a cache hit)
+    cached: bool = False
+    error: Optional[str] = None
 
 
 class PaginatedResponse(BaseModel):
@@ -61,4 +81,5 @@ class PaginatedResponse(BaseModel):
     total_items: int
     sort_by: Optional[str] = None
     sort_order: Optional[Literal["asc", "desc"]] = None
+    next_cursor: Optional[str] = None  # opaque keyset cursor for the page after this one
 
@@ -0,0 +1,77 @@
+"""Process-wide cache of authorized gspread clients and opened spreadsheets.
+
+Building service-account credentials, authorizing and ``open_by_key`` cost
+several round trips plus a token mint; doing that once per process (and
+refreshing on a TTL, or when the key file changes) leaves a sheet write
+with a single API call.
+"""
+
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+# Credentials refresh their own access tokens; the TTL just bounds how long a client object lives
+CLIENT_TTL = float(os.getenv("KALLIX_SHEETS_CLIENT_TTL", "3000"))
+# Spreadsheet handles cache worksheet metadata, so re-open them now and then to see new tabs
+SPREADSHEET_TTL = float(os.getenv("KALLIX_SHEETS_SPREADSHEET_TTL", "600"))
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, int], Tuple[float, Any]] = {}
+_spreadsheets: Dict[str, Tuple[float, Any]] = {}
+
+
+def service_account_path() -> Optional[str]:
+    path = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+    return path if path and os.path.exists(path) else None
+
+
+def get_client(sa_path: str) -> Any:
+    import gspread  # type: ignore
+    from google.oauth2.service_account import Credentials  # type: ignore
+
+    # Keyed on the file's mtime so a rotated key is picked up without a restart
+    key = (sa_path, os.stat(sa_path).st_mtime_ns)
+    now = time.monotonic()
+    with _lock:
+        cached = _clients.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+    client = gspread.authorize(Credentials.from_service_account_file(sa_path, scopes=SCOPES))
+    with _lock:
+        for stale in [k for k in _clients if k[0] == sa_path]:
+            del _clients[stale]
+        _clients[key] = (now + CLIENT_TTL, client)
+        _spreadsheets.clear()
+    return client
+
+
+def open_spreadsheet(sheet_id: str, sa_path: Optional[str] = None) -> Any:
+    sa_path = sa_path or service_account_path()
+    if not sa_path:
+        raise RuntimeError("Missing GOOGLE_SERVICE_ACCOUNT_JSON")
+    client = get_client(sa_path)
+    now = time.monotonic()
+    with _lock:
+        cached = _spreadsheets.get(sheet_id)
+        if cached and cached[0] > now:
+            return cached[1]
+    spreadsheet = client.open_by_key(sheet_id)
+    with _lock:
+        _spreadsheets[sheet_id] = (now + SPREADSHEET_TTL, spreadsheet)
+    return spreadsheet
+
+
+def invalidate(sheet_id: Optional[str] = None) -> None:
+    # Called after a failed write so the next attempt starts from a fresh handle
+    with _lock:
+        if sheet_id is None:
+            _clients.clear()
+            _spreadsheets.clear()
+        else:
+            _spreadsheets.pop(sheet_id, None)
@@ -1,8 +1,19 @@
 from __future__ import annotations
+import base64
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
 
+import pandas as pd
+from loguru import logger
+
+from .backends import JsonFileBackend, JsonlLogBackend, SqliteBackend, StorageBackend
+from .backends.base import HEAVY_FIELDS
+from .columnar import ColumnarTable
+from .metrics import timed
+from .rollups import ROLLUP_FILE_NAME, RollupRow, RollupStore
 from .schemas import (
     ClientBusinessDetails,
     KnowledgeBaseEntry,
@@ -15,96 +26,331 @@ CLIENTS_FILE = DATA_DIR / "clients.json"
 KB_FILE = DATA_DIR / "kb_entries.json"
 CALLS_FILE = DATA_DIR / "calls.json"
 ACTIONS_FILE = DATA_DIR / "actions.json"
+SQLITE_FILE = DATA_DIR / "kallix.sqlite3"
 
+# "sqlite" (default), "json" or "jsonl" (append-only logs for calls/actions)
+STORAGE_BACKEND = os.getenv("KALLIX_STORAGE_BACKEND", "sqlite")
+# jsonl only: "always", "interval" or "never"
+JSONL_FSYNC = os.getenv("KALLIX_JSONL_FSYNC", "interval")
+JSONL_FSYNC_INTERVAL = float(os.getenv("KALLIX_JSONL_FSYNC_INTERVAL", "1.0"))
+JSONL_ROTATE_MB = int(os.getenv("KALLIX_JSONL_ROTATE_MB", "64"))
 
-def _ensure_files() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    for f in [CLIENTS_FILE, KB_FILE, CALLS_FILE, ACTIONS_FILE]:
-        if not f.exists():
-            f.write_text(json.dumps({"items": []}, indent=2))
+_backend: Optional[StorageBackend] = None
+_rollups: Optional[RollupStore] = None
+# table -> (backend version the snapshot reflects, snapshot, this process's writes not yet folded in)
+_columnar: Dict[str, Tuple[Hashable, ColumnarTable, List[Dict[str, Any]]]] = {}
+_columnar_lock = threading.Lock()
 
 
-def _read_items(path: Path) -> List[Dict[str, Any]]:
-    _ensure_files()
-    data = json.loads(path.read_text() or "{}")
-    return data.get("items", [])
+def make_backend(name: str, data_dir: Path) -> StorageBackend:
+    data_dir = Path(data_dir)
+    if name == "json":
+        return JsonFileBackend(data_dir)
+    if name == "jsonl":
+        return JsonlLogBackend(
+            data_dir,
+            fsync=JSONL_FSYNC,
+            fsync_interval=JSONL_FSYNC_INTERVAL,
+            rotate_bytes=JSONL_ROTATE_MB * 1024 * 1024,
+        )
+    if name == "sqlite":
+        # A new database is seeded from the JSON files it replaces
+        sqlite_file = data_dir / SQLITE_FILE.name
+        seed = None
+        if not sqlite_file.exists():
+            legacy = JsonFileBackend(data_dir)
+            seed = {table: legacy.read_all(table) for table in legacy.paths if legacy.paths[table].exists()}
+        return SqliteBackend(sqlite_file, import_from=seed)
+    raise ValueError(f"Unknown KALLIX_STORAGE_BACKEND: {name}")
 
 
-def _write_items(path: Path, items: List[Dict[str, Any]]) -> None:
-    path.write_text(json.dumps({"items": items}, indent=2))
+def get_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        _backend = make_backend(STORAGE_BACKEND, DATA_DIR)
+    return _backend
 
 
-def upsert_client(details: ClientBusinessDetails) -> Dict[str, Any]:
-    items = _read_items(CLIENTS_FILE)
-    existing_idx = next((i for i, it in enumerate(items) if it["client_id"] == details.client_id), None)
-    if existing_idx is not None:
-        items[existing_idx] = details.model_dump()
-    else:
-        items.append(details.model_dump())
-    _write_items(CLIENTS_FILE, items)
-    return details.model_dump()
+def set_backend(backend: Optional[StorageBackend]) -> None:
+    global _backend, _rollups
+    _backend = backend
+    if _rollups is not None:
+        _rollups.close()
+        _rollups = None
+    with _columnar_lock:
+        _columnar.clear()
+
+
+def _call_rollup_row(c: Dict[str, Any]) -> RollupRow:
+    return c["call_id"], c.get("client_id"), c.get("agent_id"), c.get("call_status"), c.get("timestamp")
+
+
+def _action_rollup_row(a: Dict[str, Any]) -> RollupRow:
+    return a["action_id"], a.get("client_id"), a.get("action_type"), a.get("status"), a.get("timestamp")
+
+
+@timed("storage")
+def rebuild_rollups(batch_size: int = 5000) -> None:
+    # Recounts both kinds from the stored records in one pass each
+    rollups = get_rollups()
+    backend = get_backend()
+    for kind, table, to_row in (("calls", "calls", _call_rollup_row), ("actions", "actions", _action_rollup_row)):
+        rollups.reset(kind)
+        batch: List[RollupRow] = []
+        for item in backend.iter_items(table, {}, batch_size):
+            batch.append(to_row(item))
+            if len(batch) >= batch_size:
+                rollups.record(kind, batch)
+                batch = []
+        rollups.record(kind, batch)
+
+
+def get_rollups() -> RollupStore:
+    """Analytics rollups stored alongside the current backend's data (seeded from it when new)."""
+    global _rollups
+    if _rollups is None:
+        backend = get_backend()
+        data_dir = getattr(backend, "data_dir", None) or Path(getattr(backend, "path", SQLITE_FILE)).parent
+        _rollups = RollupStore(Path(data_dir) / ROLLUP_FILE_NAME)
+        if _rollups.created:
+            rebuild_rollups()
+    return _rollups
+
+
+_ROLLUP_ROWS = {"calls": _call_rollup_row, "actions": _action_rollup_row}
+
+
+def _before_write(table: str) -> Optional[Hashable]:
+    # Only needed to tell this write apart from other processes' when a snapshot is cached
+    with _columnar_lock:
+        return get_backend().version(table) if table in _columnar else None
+
+
+def _after_write(table: str, items: List[Dict[str, Any]], before: Optional[Hashable]) -> None:
+    # The records are already stored; derived views failing must not fail the write
+    try:
+        get_rollups().record(table, [_ROLLUP_ROWS[table](it) for it in items])
+    except Exception:
+        logger.exception(f"Updating {table} rollups failed")
+    with _columnar_lock:
+        cached = _columnar.get(table)
+        # If the snapshot was current before this write, buffering the records keeps it current;
+        # otherwise another process wrote too and the next read rebuilds
+        if cached is not None and before is not None and cached[0] == before:
+            cached[2].extend(items)
+            _columnar[table] = (get_backend().version(table), cached[1], cached[2])
+
+
+def columnar(table: str) -> ColumnarTable:
+    """Columnar snapshot of ``calls`` or ``actions``, rebuilt when another process changes the table."""
+    backend = get_backend()
+    with _columnar_lock:
+        version = backend.version(table)
+        cached = _columnar.get(table)
+        if cached is not None and cached[0] == version:
+            snapshot, pending = cached[1], cached[2]
+            if pending:
+                # Writes since the last read are folded in with one concat, not one per write
+                snapshot = snapshot.apply(pending)
+                _columnar[table] = (version, snapshot, [])
+            return snapshot
+        # Transcripts are dropped by the backend, so the rebuild never parses them
+        items = backend.iter_items(table, {}, 5000, exclude=HEAVY_FIELDS.get(table, ()))
+        snapshot = ColumnarTable.build(table, items)
+        _columnar[table] = (version, snapshot, [])
+        return snapshot
+
+
+def _frame(
+    table: str,
+    filters: Dict[str, Any],
+    sort_by: Optional[str],
+    sort_order: Optional[str],
+    page: int,
+    per_page: Optional[int],
+) -> Tuple[pd.DataFrame, int]:
+    snapshot = columnar(table)
+    pos = snapshot.positions({k: v for k, v in filters.items() if v}, sort_by, sort_order)
+    if per_page is None:
+        # Every row in table order shares the snapshot's arrays
+        return snapshot.frame(None if len(pos) == len(snapshot) and not sort_by else pos), len(pos)
+    start = (page - 1) * per_page
+    return snapshot.frame(pos[start : start + per_page]), len(pos)
+
+
+@timed("storage")
+def compact_logs() -> Dict[str, int]:
+    # Fold rotated JSONL segments into one; a no-op for the other backends
+    backend = get_backend()
+    if not isinstance(backend, JsonlLogBackend):
+        return {}
+    return {table: backend.compact(table) for table in backend.log_paths}
+
+
+def _encode_cursor(sort_by: Optional[str], sort_order: Optional[str], key: Tuple[Any, int]) -> str:
+    raw = json.dumps([sort_by, sort_order, key[0], key[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
 
+def _decode_cursor(cursor: str, sort_by: Optional[str], sort_order: Optional[str]) -> Optional[Tuple[Any, int]]:
+    # A cursor only resumes the ordering it was issued for; anything else falls back to page/offset
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort_by, c_sort_order, value, seq = json.loads(raw)
+    except Exception:
+        return None
+    if c_sort_by != sort_by or c_sort_order != sort_order:
+        return None
+    return value, int(seq)
 
-def list_clients(page: int = 1, per_page: int = 10, sort_by: Optional[str] = None, sort_order: Optional[str] = "asc") -> Dict[str, Any]:
-    items = _read_items(CLIENTS_FILE)
-    if sort_by:
-        items.sort(key=lambda x: (x.get(sort_by) or ""))
-        if sort_order == "desc":
-            items.reverse()
-    total = len(items)
+
+def _paginate(
+    table: str,
+    filters: Dict[str, Any],
+    page: int,
+    per_page: int,
+    sort_by: Optional[str],
+    sort_order: Optional[str],
+    cursor: Optional[str] = None,
+    exclude: Tuple[str, ...] = (),
+) -> Dict[str, Any]:
     start = (page - 1) * per_page
-    end = start + per_page
+    after = _decode_cursor(cursor, sort_by, sort_order) if cursor else None
+    items, total, last = get_backend().query(
+        table,
+        {k: v for k, v in filters.items() if v},
+        sort_by,
+        sort_order,
+        offset=start,
+        limit=per_page,
+        after=after,
+        exclude=exclude,
+    )
+    has_more = len(items) == per_page and (after is not None or start + per_page < total)
     return {
-        "items": items[start:end],
+        "items": items,
         "page": page,
         "per_page": per_page,
         "total_items": total,
         "sort_by": sort_by,
         "sort_order": sort_order,
+        "next_cursor": _encode_cursor(sort_by, sort_order, last) if has_more and last else None,
     }
 
 
+@timed("storage")
+def upsert_client(details: ClientBusinessDetails) -> Dict[str, Any]:
+    get_backend().upsert("clients", details.model_dump())
+    return details.model_dump()
+
+
+@timed("storage")
+def bulk_upsert_clients(details: Iterable[ClientBusinessDetails]) -> int:
+    # Single pass over ``details``, applied in one write/transaction; returns the number applied
+    return get_backend().bulk_upsert("clients", (d.model_dump() for d in details))
+
+
+@timed("storage")
+def list_clients(
+    page: int = 1,
+    per_page: int = 10,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    return _paginate("clients", {}, page, per_page, sort_by, sort_order, cursor)
+
+
+@timed("storage")
 def add_kb_entry(entry: KnowledgeBaseEntry) -> Dict[str, Any]:
-    items = _read_items(KB_FILE)
-    items.append(entry.model_dump())
-    _write_items(KB_FILE, items)
+    get_backend().append("kb_entries", entry.model_dump())
     return entry.model_dump()
 
 
+@timed("storage")
 def list_kb_entries(
     client_id: Optional[str] = None,
     page: int = 1,
     per_page: int = 10,
     sort_by: Optional[str] = "created_at",
     sort_order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    include_values: bool = False,
 ) -> Dict[str, Any]:
-    items = _read_items(KB_FILE)
-    if client_id:
-        items = [it for it in items if it.get("client_id") == client_id]
-    if sort_by:
-        items.sort(key=lambda x: (x.get(sort_by) or ""))
-        if sort_order == "desc":
-            items.reverse()
-    total = len(items)
-    start = (page - 1) * per_page
-    end = start + per_page
-    return {
-        "items": items[start:end],
-        "page": page,
-        "per_page": per_page,
-        "total_items": total,
-        "sort_by": sort_by,
-        "sort_order": sort_order,
-    }
+    # Values (extracted PDF text etc.) are left out unless asked for; get_kb_entry has the full entry
+    exclude = () if include_values else HEAVY_FIELDS["kb_entries"]
+    return _paginate("kb_entries", {"client_id": client_id}, page, per_page, sort_by, sort_order, cursor, exclude)
+
+
+@timed("storage")
+def get_kb_entry(kb_entry_id: str) -> Optional[Dict[str, Any]]:
+    return get_backend().get("kb_entries", kb_entry_id)
+
+
+@timed("storage")
+def kb_signature(client_id: str) -> Tuple[int, Optional[str]]:
+    """``(entry count, newest created_at)`` of one client's KB; changes when any process adds an entry."""
+    items, total, _ = get_backend().query(
+        "kb_entries", {"client_id": client_id}, "created_at", "desc", 0, 1, exclude=HEAVY_FIELDS["kb_entries"]
+    )
+    return total, items[0].get("created_at") if items else None
+
+
+@timed("storage")
+def kb_entries_after(
+    client_id: str, after: Optional[Tuple[Any, int]] = None, limit: int = 1000
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, int]]]:
+    """Up to ``limit`` of one client's KB entries in insertion order, after the key a previous call returned."""
+    items, _, last = get_backend().query("kb_entries", {"client_id": client_id}, None, None, 0, limit, after=after)
+    return items, last or after
 
 
+@timed("storage")
+def search_kb(query: str, client_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Knowledge-base entries whose value contains every word of ``query``, best match first."""
+    return get_backend().search("kb_entries", query, {"client_id": client_id} if client_id else {}, limit)
+
+
+@timed("storage")
 def add_call_record(record: CallRecord) -> Dict[str, Any]:
-    items = _read_items(CALLS_FILE)
-    items.append(record.model_dump())
-    _write_items(CALLS_FILE, items)
-    return record.model_dump()
+    data = record.model_dump()
+    before = _before_write("calls")
+    get_backend().append("calls", data)
+    _after_write("calls", [data], before)
+    return data
+
+
+@timed("storage")
+def add_call_records(records: Iterable[CallRecord]) -> int:
+    # Bulk path for backfills; records are keyed by call_id, so re-importing is idempotent
+    written: List[Dict[str, Any]] = []
+
+    def dump() -> Iterator[Dict[str, Any]]:
+        for r in records:
+            data = r.model_dump()
+            written.append(data)
+            yield data
+
+    before = _before_write("calls")
+    count = get_backend().bulk_upsert("calls", dump())
+    _after_write("calls", written, before)
+    return count
+
+
+@timed("storage")
+def iter_call_records(
+    client_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    call_status: Optional[str] = None,
+    batch_size: int = 1000,
+    include_transcripts: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    filters = {"client_id": client_id, "agent_id": agent_id, "call_status": call_status}
+    exclude = () if include_transcripts else HEAVY_FIELDS["calls"]
+    return get_backend().iter_items("calls", {k: v for k, v in filters.items() if v}, batch_size, exclude)
 
 
+@timed("storage")
 def list_call_records(
     client_id: Optional[str] = None,
     agent_id: Optional[str] = None,
@@ -113,61 +359,108 @@ def list_call_records(
     per_page: int = 10,
     sort_by: Optional[str] = "timestamp",
     sort_order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    include_transcripts: bool = False,
 ) -> Dict[str, Any]:
-    items = _read_items(CALLS_FILE)
-    if client_id:
-        items = [it for it in items if it.get("client_id") == client_id]
-    if agent_id:
-        items = [it for it in items if it.get("agent_id") == agent_id]
-    if call_status:
-        items = [it for it in items if it.get("call_status") == call_status]
-    if sort_by:
-        items.sort(key=lambda x: (x.get(sort_by) or ""))
-        if sort_order == "desc":
-            items.reverse()
-    total = len(items)
-    start = (page - 1) * per_page
-    end = start + per_page
-    return {
-        "items": items[start:end],
-        "page": page,
-        "per_page": per_page,
-        "total_items": total,
-        "sort_by": sort_by,
-        "sort_order": sort_order,
-    }
+    # Transcripts are left out unless asked for; get_call loads one on demand
+    filters = {"client_id": client_id, "agent_id": agent_id, "call_status": call_status}
+    exclude = () if include_transcripts else HEAVY_FIELDS["calls"]
+    return _paginate("calls", filters, page, per_page, sort_by, sort_order, cursor, exclude)
+
+
+@timed("storage")
+def get_call(call_id: str) -> Optional[Dict[str, Any]]:
+    return get_backend().get("calls", call_id)
+
+
+@timed("storage")
+def call_frame(
+    client_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    call_status: Optional[str] = None,
+    sort_by: Optional[str] = "timestamp",
+    sort_order: Optional[str] = "desc",
+    page: int = 1,
+    per_page: Optional[int] = None,
+) -> Tuple[pd.DataFrame, int]:
+    """Call metadata (no transcripts) as a DataFrame plus the total match count; all pages when ``per_page`` is None."""
+    filters = {"client_id": client_id, "agent_id": agent_id, "call_status": call_status}
+    return _frame("calls", filters, sort_by, sort_order, page, per_page)
 
 
+@timed("storage")
+def search_calls(
+    query: str,
+    client_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """Call records whose transcript contains every word of ``query``, best match first."""
+    filters = {"client_id": client_id, "agent_id": agent_id}
+    return get_backend().search("calls", query, {k: v for k, v in filters.items() if v}, limit)
+
+
+@timed("storage")
 def add_tool_action(event: ToolActionEvent) -> Dict[str, Any]:
-    items = _read_items(ACTIONS_FILE)
-    items.append(event.model_dump())
-    _write_items(ACTIONS_FILE, items)
-    return event.model_dump()
+    data = event.model_dump()
+    before = _before_write("actions")
+    get_backend().append("actions", data)
+    _after_write("actions", [data], before)
+    return data
+
+
+@timed("storage")
+def update_tool_action(event: ToolActionEvent) -> Dict[str, Any]:
+    # Rewrites the event under its action_id; it keeps its place in insertion order
+    data = event.model_dump()
+    before = _before_write("actions")
+    get_backend().upsert("actions", data)
+    _after_write("actions", [data], before)
+    return data
+
+
+@timed("storage")
+def add_tool_actions(events: Iterable[ToolActionEvent]) -> int:
+    written: List[Dict[str, Any]] = []
+
+    def dump() -> Iterator[Dict[str, Any]]:
+        for e in events:
+            data = e.model_dump()
+            written.append(data)
+            yield data
+
+    before = _before_write("actions")
+    count = get_backend().bulk_upsert("actions", dump())
+    _after_write("actions", written, before)
+    return count
+
+
+@timed("storage")
+def iter_tool_actions(client_id: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    return get_backend().iter_items("actions", {"client_id": client_id} if client_id else {}, batch_size)
 
 
+@timed("storage")
 def list_tool_actions(
     client_id: Optional[str] = None,
     page: int = 1,
     per_page: int = 10,
     sort_by: Optional[str] = "timestamp",
     sort_order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    items = _read_items(ACTIONS_FILE)
-    if client_id:
-        items = [it for it in items if it.get("client_id") == client_id]
-    if sort_by:
-        items.sort(key=lambda x: (x.get(sort_by) or ""))
-        if sort_order == "desc":
-            items.reverse()
-    total = len(items)
-    start = (page - 1) * per_page
-    end = start + per_page
-    return {
-        "items": items[start:end],
-        "page": page,
-        "per_page": per_page,
-        "total_items": total,
-        "sort_by": sort_by,
-        "sort_order": sort_order,
-    }
+    return _paginate("actions", {"client_id": client_id}, page, per_page, sort_by, sort_order, cursor)
+
 
+@timed("storage")
+def action_frame(
+    client_id: Optional[str] = None,
+    action_type: Optional[str] = None,
+    status: Optional[str] = None,
+    sort_by: Optional[str] = "timestamp",
+    sort_order: Optional[str] = "desc",
+    page: int = 1,
+    per_page: Optional[int] = None,
+) -> Tuple[pd.DataFrame, int]:
+    filters = {"client_id": client_id, "action_type": action_type, "status": status}
+    return _frame("actions", filters, sort_by, sort_order, page, per_page)
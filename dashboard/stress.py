@@ -0,0 +1,87 @@
+"""Multi-process write stress harness for the storage backends.
+
+Run ``python -m dashboard.stress --backend json --processes 8 --records 200``.
+Every worker process hammers ``add_call_record`` (and ``upsert_client``)
+against one shared data directory; afterwards the harness checks that every
+record it wrote can be read back. The exit status is non-zero if anything
+was lost.
+"""
+
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from . import storage
+from .schemas import CallRecord, ClientBusinessDetails, ContactInfo
+from .utils import now_iso
+
+
+def _worker(args: Tuple[str, str, int, int]) -> int:
+    backend_name, data_dir, worker, records = args
+    storage.set_backend(storage.make_backend(backend_name, Path(data_dir)))
+    for i in range(records):
+        storage.add_call_record(
+            CallRecord(
+                call_id=f"call_w{worker}_{i}",
+                client_id=f"client_{worker}",
+                timestamp=now_iso(),
+                agent_id="stress_agent",
+                callee=f"+1555{worker:03d}{i:04d}",
+                transcript="stress",
+                audio_url="",
+                call_status="completed",
+                error_message=None,
+            )
+        )
+        if i % 10 == 0:
+            storage.upsert_client(
+                ClientBusinessDetails(
+                    client_id=f"client_{worker}",
+                    business_name=f"Stress {worker} rev {i}",
+                    business_description="",
+                    industry="stress",
+                    contact_info=ContactInfo(email="stress@example.com", phone="0"),
+                )
+            )
+    return records
+
+
+def run(backend_name: str, processes: int, records: int, data_dir: Path) -> bool:
+    storage.make_backend(backend_name, data_dir)  # create files/schema before the workers race
+    started = time.perf_counter()
+    with mp.get_context("spawn").Pool(processes) as pool:
+        written = sum(pool.map(_worker, [(backend_name, str(data_dir), w, records) for w in range(processes)]))
+    elapsed = time.perf_counter() - started
+
+    backend = storage.make_backend(backend_name, data_dir)
+    calls, total_calls, _ = backend.query("calls", {}, None, None, offset=0, limit=written + 1)
+    _, total_clients, _ = backend.query("clients", {}, None, None, offset=0, limit=processes + 1)
+    missing = {f"call_w{w}_{i}" for w in range(processes) for i in range(records)} - {c["call_id"] for c in calls}
+
+    print(
+        f"backend={backend_name} processes={processes} written={written} "
+        f"read_back={total_calls} clients={total_clients}/{processes} "
+        f"missing={len(missing)} elapsed={elapsed:.2f}s ({written / elapsed:.0f} writes/s)"
+    )
+    return not missing and total_calls == written and total_clients == processes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["json", "jsonl", "sqlite"], default=storage.STORAGE_BACKEND)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--data-dir", help="Shared data directory (defaults to a fresh temp dir)")
+    args = parser.parse_args()
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix="kallix_stress_"))
+    ok = run(args.backend, args.processes, args.records, data_dir)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
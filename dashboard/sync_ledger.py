@@ -0,0 +1,70 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced (
+    target TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    remote_id TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (target, client_id, record_key)
+) WITHOUT ROWID;
+"""
+
+
+def record_key(record: Dict[str, Any]) -> str:
+    """Dedupe key for an outbound record: its email if it has one, else a hash of its content."""
+    for k, v in record.items():
+        if k.lower() == "email" and isinstance(v, str) and v.strip():
+            return f"email:{v.strip().lower()}"
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return "sha256:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SyncLedger:
+    """Records which outbound records a target (e.g. a CRM) has already accepted.
+
+    Lets nightly syncs skip everything that went through on a previous run.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def synced(self, target: str, client_id: str, keys: List[str]) -> Dict[str, Optional[str]]:
+        """``{record_key: remote_id}`` for the keys already synced to ``target``."""
+        found: Dict[str, Optional[str]] = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self._conn.execute(
+                    f"SELECT record_key, remote_id FROM synced WHERE target = ? AND client_id = ? "
+                    f"AND record_key IN ({', '.join('?' * len(chunk))})",
+                    [target, client_id, *chunk],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def mark(self, target: str, client_id: str, entries: Iterable[Tuple[str, Optional[str]]]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO synced (target, client_id, record_key, remote_id, synced_at) VALUES (?, ?, ?, ?, ?)",
+                [(target, client_id, key, remote_id, now) for key, remote_id in entries],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,8 +1,19 @@
 from __future__ import annotations
+import hashlib
+import multiprocessing as mp
+import os
 import re
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
-from typing import Optional
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .backends.locking import atomic_write_text
+from .schemas import PdfExtractionResult
 
 
 def generate_id(prefix: str) -> str:
@@ -18,22 +29,113 @@ def validate_drive_link(url: str) -> bool:
     return re.match(pattern, url) is not None
 
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+# Extracted PDF text is cached here by SHA-256 of the file bytes
+PDF_CACHE_DIR = Path(os.getenv("KALLIX_PDF_CACHE_DIR", str(Path(__file__).parent / "data" / "pdf_cache")))
+PDF_PAGES_PER_TASK = 16
+# Below this many pages the pool's startup/pickling cost outweighs the parallelism
+PDF_PARALLEL_MIN_PAGES = 32
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _pdf_reader_cls():
+    try:
+        # Primary parser
+        from PyPDF2 import PdfReader as _PdfReader  # type: ignore
+    except ImportError:
+        # Fallback parser if installed under alternate name
+        from pypdf import PdfReader as _PdfReader  # type: ignore
+    return _PdfReader
+
+
+def _extract_pages(file_bytes: bytes, start: int, stop: int) -> List[str]:
+    # Runs in a worker process; each task re-opens the PDF and extracts its own page range
+    reader = _pdf_reader_cls()(BytesIO(file_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn: forking a multi-threaded Streamlit server is unsafe
+            _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 2, mp_context=mp.get_context("spawn"))
+        return _pdf_pool
+
+
+def _reset_pdf_pool() -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def iter_pdf_pages(file_bytes: bytes, parallel: Optional[bool] = None) -> Iterator[str]:
+    """Yield the text of each page in order.
+
+    Large documents are split into page ranges that a process pool extracts
+    concurrently; pages are yielded as soon as their range is done.
+    """
+    n_pages = len(_pdf_reader_cls()(BytesIO(file_bytes)).pages)
+    if parallel is None:
+        parallel = n_pages >= PDF_PARALLEL_MIN_PAGES and (os.cpu_count() or 1) > 1
+    ranges = [(i, min(i + PDF_PAGES_PER_TASK, n_pages)) for i in range(0, n_pages, PDF_PAGES_PER_TASK)]
+    if not parallel:
+        for start, stop in ranges:
+            yield from _extract_pages(file_bytes, start, stop)
+        return
+    futures = [_get_pdf_pool().submit(_extract_pages, file_bytes, start, stop) for start, stop in ranges]
+    done = 0
+    try:
+        for fut in futures:
+            pages = fut.result()
+            done += 1
+            yield from pages
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge page); replace the pool and finish in-process
+        _reset_pdf_pool()
+        for start, stop in ranges[done:]:
+            yield from _extract_pages(file_bytes, start, stop)
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def _pdf_cache_path(digest: str) -> Path:
+    return PDF_CACHE_DIR / f"{digest}.txt"
+
+
+def extract_text_from_pdf(
+    file_bytes: bytes,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> PdfExtractionResult:
+    """Extract all text from a PDF, reusing the cached text for bytes seen before.
+
+    ``on_page`` is called with the number of pages done so far, for progress display.
+    """
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    cache_path = _pdf_cache_path(digest)
+    try:
+        text = cache_path.read_text(encoding="utf-8")
+        return PdfExtractionResult(sha256=digest, ok=True, text=text, cached=True)
+    except FileNotFoundError:
+        pass
     try:
-        from io import BytesIO
-        try:
-            # Primary parser
-            from PyPDF2 import PdfReader as _PdfReader  # type: ignore
-        except ImportError:
-            try:
-                # Fallback parser if installed under alternate name
-                from pypdf import PdfReader as _PdfReader  # type: ignore
-            except Exception as e:
-                return f"PDF parsing failed: missing PDF parser ({e})"
-        reader = _PdfReader(BytesIO(file_bytes))
         texts = []
-        for page in reader.pages:
-            texts.append(page.extract_text() or "")
-        return "\n".join(texts).strip()
+        for page_text in iter_pdf_pages(file_bytes):
+            texts.append(page_text)
+            if on_page:
+                on_page(len(texts))
+    except ImportError as e:
+        return PdfExtractionResult(sha256=digest, ok=False, error=f"missing PDF parser ({e})")
     except Exception as e:
-        return f"PDF parsing failed: {e}"
+        return PdfExtractionResult(sha256=digest, ok=False, error=str(e) or type(e).__name__, pages=len(texts))
+    text = "\n".join(texts).strip()
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(cache_path, text)
+    except OSError:
+        pass  # cache is best-effort
+    return PdfExtractionResult(sha256=digest, ok=True, text=text, pages=len(texts))
@@ -0,0 +1 @@
+"""Shared building blocks for the Kallix lead capture services."""
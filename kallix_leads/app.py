@@ -0,0 +1,229 @@
+import modal
+import asyncio
+import hmac
+import random
+import time
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import httpx, os
+from datetime import datetime
+from loguru import logger
+from dotenv import load_dotenv
+
+from kallix_leads.dedup import DedupCache, request_key
+from kallix_leads.metrics import METRICS
+from kallix_leads.spool import LeadFlusher, LeadSpool
+from kallix_leads.verticals import VERTICALS
+
+load_dotenv()
+
+image = (
+    modal.Image.debian_slim()
+    .pip_install("fastapi", "httpx", "loguru", "pydantic", "python-dotenv", "uvicorn")
+    .add_local_python_source("kallix_leads")
+)
+# SQLite on a Volume only works with one writer: the app runs in a single container and commits
+# the volume after every spool change, so a replacement container starts from the latest state
+spool_volume = modal.Volume.from_name("kallix-lead-spool", create_if_missing=True)
+
+SPOOL_DIR = os.environ.get("LEAD_SPOOL_DIR", "/data")
+# Above 1 the webhook receives {"leads": [...]}, which needs a batch-aware Apps Script doPost;
+# the deployed scripts only take a single lead, so batching stays opt-in
+BATCH_SIZE = int(os.environ.get("LEAD_BATCH_SIZE", "1"))
+# Delivered leads are deleted from the spool after this many seconds
+SENT_RETENTION = float(os.environ.get("LEAD_SENT_RETENTION", str(7 * 86400)))
+# Share of successful captures that get an info log line; failures are always logged
+LOG_SAMPLE_RATE = float(os.environ.get("LEAD_LOG_SAMPLE_RATE", "0.01"))
+# Repeats of the same caller within this many seconds are answered with the first lead_id
+DEDUP_WINDOW = float(os.environ.get("LEAD_DEDUP_WINDOW", "60"))
+# How long an explicit Idempotency-Key is remembered
+IDEMPOTENCY_TTL = float(os.environ.get("LEAD_IDEMPOTENCY_TTL", "86400"))
+DEDUP_MAX_ENTRIES = int(os.environ.get("LEAD_DEDUP_MAX_ENTRIES", "10000"))
+# "1" also keeps reservations in the spool database, so they survive container restarts
+DEDUP_PERSIST = os.environ.get("LEAD_DEDUP_PERSIST", "0") == "1"
+# Bearer token for the /admin routes; unset disables them
+ADMIN_TOKEN = os.environ.get("LEAD_ADMIN_TOKEN", "")
+
+
+def log_sampled(event: str, **fields) -> None:
+    if random.random() < LOG_SAMPLE_RATE:
+        logger.bind(event=event, **fields).info(f"{event} " + " ".join(f"{k}={v}" for k, v in fields.items()))
+
+
+@asynccontextmanager
+async def lifespan(api: FastAPI):
+    # One pooled keep-alive client and one spool per container, shared by every vertical
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(5.0),
+        # Apps Script /exec runs doPost and then answers with a 302 to the script output
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+    ) as client:
+        spool = LeadSpool(Path(SPOOL_DIR) / "kallix_leads.sqlite3")
+        # Outside Modal (e.g. the load test) there is no volume to commit
+        persist = None if modal.is_local() else (lambda: spool.checkpoint(spool_volume.commit))
+        flushers = {}
+        for slug, vertical in VERTICALS.items():
+            flushers[slug] = LeadFlusher(
+                spool,
+                client,
+                vertical.webhook_url,
+                vertical=slug,
+                batch_size=BATCH_SIZE,
+                sent_retention=SENT_RETENTION,
+                on_change=persist,
+            )
+        api.state.spool = spool
+        api.state.flushers = flushers
+        if DEDUP_PERSIST:
+            spool.purge_dedup()
+        api.state.dedup = DedupCache(DEDUP_MAX_ENTRIES, spool if DEDUP_PERSIST else None)
+        tasks = [asyncio.create_task(f.run()) for f in flushers.values()]
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                with suppress(asyncio.CancelledError):
+                    await task
+            # Best-effort drain; anything left stays spooled for the next container
+            with suppress(Exception):
+                await asyncio.wait_for(
+                    asyncio.gather(*(f.flush_once() for f in flushers.values())), timeout=5.0
+                )
+            if persist is not None:
+                with suppress(Exception):
+                    await asyncio.to_thread(persist)
+            spool.close()
+
+
+app = modal.App("kallix_leads")
+web_app = FastAPI(title="Kallix Lead API", lifespan=lifespan)
+
+
+@web_app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, so label values stay bounded
+        route = request.scope.get("route")
+        METRICS.observe(
+            "lead_request_seconds",
+            time.perf_counter() - started,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+
+@web_app.get("/metrics")
+async def metrics(request: Request):
+    spool = getattr(request.app.state, "spool", None)
+    gauges = {}
+    if spool is not None:
+        counts = await asyncio.to_thread(lambda: {slug: spool.counts(slug) for slug in VERTICALS})
+        gauges["lead_spool"] = {
+            (("status", status), ("vertical", slug)): n for slug, c in counts.items() for status, n in c.items()
+        }
+    return PlainTextResponse(METRICS.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@web_app.post("/admin/requeue-dead")
+async def requeue_dead(request: Request, vertical: str | None = None):
+    # Dead letters are only retried on an explicit operator request, e.g. after a broken webhook is fixed
+    if not ADMIN_TOKEN or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {ADMIN_TOKEN}"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if vertical is not None and vertical not in VERTICALS:
+        raise HTTPException(status_code=404, detail=f"Unknown vertical: {vertical}")
+    revived = await asyncio.to_thread(request.app.state.spool.requeue_dead, vertical)
+    for slug, flusher in request.app.state.flushers.items():
+        if vertical in (None, slug):
+            flusher.wake()
+    logger.info(f"♻️ Requeued {revived} dead lead(s)")
+    return {"status": "success", "requeued": revived}
+
+
+@web_app.post("/capture-lead/{vertical}")
+async def capture_lead(vertical: str, request: Request):
+    config = VERTICALS.get(vertical)
+    if config is None:
+        METRICS.inc("lead_capture_total", vertical="unknown", outcome="unknown_vertical")
+        raise HTTPException(status_code=404, detail=f"Unknown vertical: {vertical}")
+    started = time.perf_counter()
+    try:
+        data = await request.json()
+
+        lead = {
+            "client_name": data.get("client_name"),
+            "phone": data.get("phone"),
+            "email": data.get("email", ""),
+            "demo_time": data.get("demo_time", ""),
+            "remarks": data.get("remarks", ""),
+            "agent": data.get(config.agent_field, config.default_agent),
+            "timestamp": datetime.now().isoformat() + "Z"
+        }
+
+        if not config.webhook_url:
+            METRICS.inc("lead_capture_total", vertical=vertical, outcome="not_configured")
+            logger.warning(f"{config.webhook_env} is not configured; rejecting {config.label} lead")
+            return {"status": "error", "message": f"{config.webhook_env} is not configured"}
+
+        # Repeats are answered before any spool write or webhook call
+        dedup = request.app.state.dedup
+        key, source = request_key(vertical, request.headers.get("Idempotency-Key"), data)
+        lead_id = None
+        if key is not None:
+            ttl = IDEMPOTENCY_TTL if source == "header" else DEDUP_WINDOW
+            # An explicit key also becomes the spool's idempotency key, so it holds after LRU eviction
+            wanted = key[:32] if source == "header" else None
+            if dedup.spool is None:
+                lead_id, duplicate = dedup.reserve(key, ttl, wanted)
+            else:
+                lead_id, duplicate = await asyncio.to_thread(dedup.reserve, key, ttl, wanted)
+            METRICS.inc("lead_dedup_total", vertical=vertical, source=source, result="hit" if duplicate else "miss")
+            if duplicate:
+                METRICS.inc("lead_capture_total", vertical=vertical, outcome="duplicate")
+                log_sampled("lead_duplicate", vertical=vertical, lead_id=lead_id, source=source)
+                return {"status": "success", "message": f"{config.label} lead already captured", "lead_id": lead_id, "duplicate": True}
+
+        # Success means the lead is durably spooled; delivery is retried until the sheet accepts it
+        try:
+            lead_id = await asyncio.to_thread(request.app.state.spool.put, lead, vertical, lead_id)
+        except Exception:
+            if key is not None:
+                await asyncio.to_thread(dedup.release, key)
+            raise
+        request.app.state.flushers[vertical].wake()
+
+        METRICS.inc("lead_capture_total", vertical=vertical, outcome="spooled")
+        log_sampled(
+            "lead_captured",
+            vertical=vertical,
+            lead_id=lead_id,
+            agent=lead["agent"],
+            handler_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return {"status": "success", "message": f"{config.label} lead captured!", "lead_id": lead_id}
+
+    except Exception as e:
+        METRICS.inc("lead_capture_total", vertical=vertical, outcome="error")
+        logger.exception(f"🔥 Error capturing {config.label} lead: {e}")
+        return {"status": "error", "message": str(e)}
+
+@app.function(
+    image=image,
+    secrets=[modal.Secret.from_name("kallix-secrets")],
+    volumes={SPOOL_DIR: spool_volume},
+    max_containers=1,
+)
+@modal.concurrent(max_inputs=100)
+@modal.asgi_app()
+def fastapi_app():
+    return web_app
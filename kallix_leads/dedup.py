@@ -0,0 +1,90 @@
+"""Duplicate suppression for ``/capture-lead``.
+
+A request is identified by its ``Idempotency-Key`` header or, without one,
+by a hash of vertical + normalized phone + email. The first request for a
+key reserves it for a TTL (``LEAD_DEDUP_WINDOW`` for derived keys,
+``LEAD_IDEMPOTENCY_TTL`` for explicit ones); repeats inside that window get
+the original ``lead_id`` back without touching the spool or the network.
+Reservations live in a bounded in-memory LRU and, optionally, in the spool
+database so they survive restarts.
+"""
+
+from __future__ import annotations
+import hashlib
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from kallix_leads.spool import LeadSpool
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def request_key(vertical: str, header: Optional[str], data: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """``(key, source)``; source is "header" or "derived", key is None when there is nothing to derive it from."""
+    if header and header.strip():
+        return _digest("header", vertical, header.strip()), "header"
+    phone = re.sub(r"\D", "", str(data.get("phone") or ""))
+    email = str(data.get("email") or "").strip().lower()
+    if not phone and not email:
+        return None, "derived"
+    return _digest("derived", vertical, phone, email), "derived"
+
+
+class DedupCache:
+    def __init__(self, max_entries: int = 10_000, spool: Optional[LeadSpool] = None):
+        self.max_entries = max_entries
+        self.spool = spool  # persistent reservations when set
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _set(self, key: str, lead_id: str, expires_at: float) -> None:
+        self._entries[key] = (lead_id, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def reserve(self, key: str, ttl: float, lead_id: Optional[str] = None) -> Tuple[str, bool]:
+        """``(lead_id, duplicate)``: the id already reserved for ``key``, or a new reservation.
+
+        Blocking when the cache is persistent (call it from a thread).
+        """
+        now = time.time()
+        lead_id = lead_id or uuid.uuid4().hex
+        with self._lock:
+            existing = self._get(key, now)
+            if existing is not None:
+                return existing, True
+            if self.spool is None:
+                self._set(key, lead_id, now + ttl)
+                return lead_id, False
+        # The spool's INSERT OR IGNORE settles races between workers and containers sharing the file
+        winner, expires_at, created = self.spool.reserve_key(key, lead_id, now + ttl)
+        with self._lock:
+            self._set(key, winner, expires_at)
+        return winner, not created
+
+    def release(self, key: str) -> None:
+        # Undo a reservation whose lead never made it into the spool
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.spool is not None:
+            self.spool.release_key(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,195 @@
+"""Local load test for ``/capture-lead`` against a stub sheet webhook.
+
+Starts the FastAPI app under uvicorn on a free port with a throwaway spool
+directory, points every vertical's webhook at an in-process stub (with
+configurable latency, failure rate and an Apps Script style 302), fires
+``--requests`` captures at ``--concurrency`` (repeating an earlier caller
+for ``--duplicate-rate`` of them, to exercise deduplication), then waits for
+the spool to drain and reports client-side throughput and latency percentiles next to the service's own ``/metrics``:
+
+    python -m kallix_leads.loadtest --requests 2000 --concurrency 50 --webhook-latency 0.05
+    python -m kallix_leads.loadtest --webhook-redirect  # every batch must land exactly once
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    server: "SheetStub"
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep the console quiet
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.server.latency)
+        if random.random() < self.server.failure_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+        leads = body.get("leads", [body])
+        with self.server.lock:
+            self.server.batches += 1
+            self.server.keys.update(lead.get("idempotency_key") for lead in leads)
+            self.server.rows += len(leads)
+        if self.server.redirect:
+            # Like Apps Script /exec: the rows are written, then the client is sent to the output URL
+            self.send_response(302)
+            self.send_header("Location", "/echo")
+            self.end_headers()
+            return
+        self._ok()
+
+    def do_GET(self) -> None:
+        self._ok()
+
+    def _ok(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+
+class SheetStub(ThreadingHTTPServer):
+    """Stands in for the Apps Script webhook; records which leads it accepted."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, redirect: bool = False):
+        super().__init__(("127.0.0.1", 0), _WebhookHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.redirect = redirect
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.keys: set = set()
+        self.rows = 0  # more rows than keys means a delivered batch was re-posted
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/exec"
+
+    def start(self) -> "SheetStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _drive(base: str, verticals: List[str], requests: int, concurrency: int, duplicate_rate: float) -> Dict[str, Any]:
+    import httpx
+
+    rng = random.Random(7)
+    # Each request is sent as caller ``callers[i]``; a duplicate reuses an earlier caller on the same vertical
+    callers = [i for i in range(requests)]
+    for i in range(len(verticals), requests):
+        if rng.random() < duplicate_rate:
+            callers[i] = callers[rng.randrange(i // len(verticals)) * len(verticals) + i % len(verticals)]
+
+    latencies: List[float] = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as client:
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            c = callers[i]
+            payload = {"client_name": f"Load {c}", "phone": f"+1555{c:07d}", "email": f"load{c}@example.com"}
+            async with sem:
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(f"/capture-lead/{verticals[i % len(verticals)]}", json=payload)
+                    ok = resp.status_code == 200 and resp.json().get("status") == "success"
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "latencies": latencies, "errors": errors, "unique": len(set(callers))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test /capture-lead against a stub sheet webhook")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--webhook-latency", type=float, default=0.05, help="Seconds the stub sheet takes per batch")
+    parser.add_argument("--webhook-failure-rate", type=float, default=0.0)
+    parser.add_argument("--webhook-redirect", action="store_true", help="Answer with a 302 like Apps Script /exec")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of requests repeating an earlier caller")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    stub = SheetStub(args.webhook_latency, args.webhook_failure_rate, args.webhook_redirect).start()
+    # Configure before importing the app, which reads its settings at import time
+    os.environ["LEAD_SPOOL_DIR"] = tempfile.mkdtemp(prefix="kallix_leads_load_")
+    os.environ.setdefault("LEAD_LOG_SAMPLE_RATE", "0")
+    from kallix_leads.verticals import VERTICALS
+
+    for vertical in VERTICALS.values():
+        os.environ[vertical.webhook_env] = stub.url
+
+    import httpx
+    import uvicorn
+    from loguru import logger
+
+    from kallix_leads.app import web_app
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(web_app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    while not server.started:
+        time.sleep(0.05)
+
+    result = asyncio.run(_drive(base, list(VERTICALS), args.requests, args.concurrency, args.duplicate_rate))
+    lat = result["latencies"]
+    print(
+        f"requests={args.requests} concurrency={args.concurrency} errors={result['errors']} "
+        f"throughput={args.requests / result['elapsed']:.0f} req/s "
+        f"p50={_percentile(lat, 0.5) * 1000:.1f}ms p99={_percentile(lat, 0.99) * 1000:.1f}ms"
+    )
+
+    deadline = time.monotonic() + args.drain_timeout
+    expected = result["unique"]
+    while len(stub.keys) < expected - result["errors"] and time.monotonic() < deadline:
+        time.sleep(0.1)
+    print(f"delivered={len(stub.keys)} of {expected} unique leads as {stub.rows} rows in {stub.batches} webhook batches")
+
+    wanted = ("lead_request_seconds_count", "lead_capture_total", "lead_webhook_seconds_count", "lead_dedup_total", "lead_spool")
+    for line in httpx.get(f"{base}/metrics").text.splitlines():
+        if line.startswith(wanted):
+            print(f"  {line}")
+    server.should_exit = True
+    sys.exit(0 if not result["errors"] and len(stub.keys) == expected == stub.rows else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Request and delivery metrics for the lead service, exposed on ``/metrics``.
+
+Kept dependency-free (the Modal image only ships ``kallix_leads``); the
+output follows the Prometheus text format so any scraper can read it.
+"""
+
+from __future__ import annotations
+import bisect
+import math
+import threading
+from typing import Any, Dict, List, Tuple
+
+# Seconds; handler time is milliseconds, webhook round trips up to the client timeout
+BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP: Dict[str, str] = {
+    "lead_request_seconds": "Time spent in the HTTP handler, by route and status code",
+    "lead_capture_total": "Capture requests by vertical and outcome",
+    "lead_webhook_seconds": "Sheet webhook round trip per batch, by vertical and outcome",
+    "lead_webhook_leads_total": "Leads in webhook batches, by vertical and outcome",
+    "lead_dedup_total": "Capture requests checked for duplicates, by vertical, key source and hit/miss",
+    "lead_spool": "Leads in the spool by vertical and status",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _value(value: float) -> str:
+    # Counters are written in full rather than rounded to six significant digits
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def quantile(self, q: float) -> float:
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[min(i, len(BUCKETS) - 1)]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hists: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            hist = self._hists.setdefault(name, {}).setdefault(key, _Histogram())
+            hist.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            hist.sum += seconds
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_key(labels), 0)
+
+    def quantile(self, name: str, q: float, **labels: Any) -> float:
+        with self._lock:
+            hist = self._hists.get(name, {}).get(_key(labels))
+            return hist.quantile(q) if hist else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists.clear()
+            self._counters.clear()
+
+    def render(self, gauges: Dict[str, Dict[Labels, float]] | None = None) -> str:
+        """Prometheus text; ``gauges`` are point-in-time values computed by the caller (e.g. spool depth)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._hists.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS + (float("inf"),), hist.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_fmt(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_fmt(labels)} {hist.sum}")
+                    lines.append(f"{name}_count{_fmt(labels)} {cumulative}")
+            for name, series in sorted(self._counters.items()):
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+                lines += [f"{name}{_fmt(labels)} {_value(value)}" for labels, value in sorted(series.items())]
+        for name, series in sorted((gauges or {}).items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_fmt(labels)} {_value(value)}" for labels, value in sorted(series.items())]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
@@ -0,0 +1,299 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from kallix_leads.metrics import METRICS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    vertical TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_due ON leads (vertical, status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    key TEXT PRIMARY KEY,
+    lead_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_expiry ON dedup_keys (expires_at);
+"""
+
+
+class LeadSpool:
+    """Durable outbound lead queue backed by a local SQLite file.
+
+    Leads are committed to disk before the caller is acknowledged and stay
+    ``pending`` until the sheet webhook accepts them, so they survive webhook
+    outages and container restarts.
+    """
+
+    def __init__(self, path: str | Path, lease_seconds: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, lead: Dict[str, Any], vertical: str = "", idempotency_key: Optional[str] = None) -> str:
+        key = idempotency_key or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO leads (idempotency_key, vertical, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, vertical, json.dumps(lead), now, now),
+            )
+        return key
+
+    def reserve_key(self, key: str, lead_id: str, expires_at: float) -> Tuple[str, float, bool]:
+        """The live reservation for ``key`` as ``(lead_id, expires_at, created)``, creating it if there is none."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM dedup_keys WHERE key = ? AND expires_at <= ?", (key, now))
+                created = self._conn.execute(
+                    "INSERT OR IGNORE INTO dedup_keys (key, lead_id, expires_at) VALUES (?, ?, ?)",
+                    (key, lead_id, expires_at),
+                ).rowcount == 1
+                row = self._conn.execute("SELECT lead_id, expires_at FROM dedup_keys WHERE key = ?", (key,)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0], row[1], created
+
+    def release_key(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM dedup_keys WHERE key = ?", (key,))
+
+    def purge_dedup(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM dedup_keys WHERE expires_at <= ?", (time.time(),))
+        return cur.rowcount
+
+    def claim(self, limit: int, vertical: str = "") -> List[Tuple[int, str, Dict[str, Any]]]:
+        # Leasing pushes next_attempt_at forward, so a crashed sender's batch is retried once the lease expires
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, idempotency_key, payload FROM leads"
+                    " WHERE vertical = ? AND status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (vertical, now, limit),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE leads SET next_attempt_at = ? WHERE id = ?",
+                        [(now + self.lease_seconds, r[0]) for r in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(r[0], r[1], json.loads(r[2])) for r in rows]
+
+    def mark_sent(self, ids: List[int]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE leads SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                [(now, i) for i in ids],
+            )
+
+    def mark_failed(
+        self, ids: List[int], error: str, max_attempts: Optional[int], base_delay: float, max_delay: float
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            for i in ids:
+                row = self._conn.execute("SELECT attempts FROM leads WHERE id = ?", (i,)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                # Exponential backoff with full jitter; the exponent is capped before it can overflow a float
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** min(attempts - 1, 30))))
+                status = "dead" if max_attempts and attempts >= max_attempts else "pending"
+                self._conn.execute(
+                    "UPDATE leads SET attempts = ?, status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, status, now + delay, error[:500], i),
+                )
+
+    def requeue_dead(self, vertical: Optional[str] = None) -> int:
+        # Operator action only (e.g. once a broken webhook is fixed): dead leads go back to
+        # pending with a fresh retry budget
+        sql = "UPDATE leads SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+        params: Tuple[Any, ...] = (time.time(),)
+        if vertical is not None:
+            sql += " AND vertical = ?"
+            params += (vertical,)
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+        return cur.rowcount
+
+    def counts(self, vertical: Optional[str] = None) -> Dict[str, int]:
+        sql = "SELECT status, COUNT(*) FROM leads"
+        params: Tuple[Any, ...] = ()
+        if vertical is not None:
+            sql += " WHERE vertical = ?"
+            params = (vertical,)
+        with self._lock:
+            rows = self._conn.execute(sql + " GROUP BY status", params).fetchall()
+        return {status: n for status, n in rows}
+
+    def purge_sent(self, older_than_seconds: float, vertical: Optional[str] = None) -> int:
+        sql = "DELETE FROM leads WHERE status = 'sent' AND sent_at < ?"
+        params: Tuple[Any, ...] = (time.time() - older_than_seconds,)
+        if vertical is not None:
+            sql += " AND vertical = ?"
+            params += (vertical,)
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+        return cur.rowcount
+
+    def checkpoint(self, then: Optional[Callable[[], None]] = None) -> None:
+        # Folds the WAL into the main file and runs ``then`` (e.g. a volume commit) before any
+        # further write, so a copy of the spool directory taken meanwhile is consistent
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            if then is not None:
+                then()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LeadFlusher:
+    """Drains a LeadSpool to a sheet webhook in batches.
+
+    With ``batch_size > 1`` the webhook receives ``{"leads": [...]}``; a batch
+    size of 1 posts the bare lead so single-row Apps Script handlers keep
+    working. Every lead carries its ``idempotency_key`` so retried batches can
+    be de-duplicated on the sheet side. Failed leads are retried with backoff
+    capped at ``max_delay`` for as long as the webhook is down, unless
+    ``max_attempts`` is set, after which they are parked as ``dead``.
+    ``on_change`` runs (in a thread) after every flush or purge that changed
+    the spool.
+    """
+
+    def __init__(
+        self,
+        spool: LeadSpool,
+        client: httpx.AsyncClient,
+        webhook_url: Optional[str],
+        vertical: str = "",
+        batch_size: int = 1,
+        max_attempts: Optional[int] = None,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        poll_interval: float = 5.0,
+        sent_retention: float = 7 * 86400,
+        purge_interval: float = 3600.0,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
+        self.spool = spool
+        self.client = client
+        self.webhook_url = webhook_url
+        self.vertical = vertical
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.sent_retention = sent_retention
+        self.purge_interval = purge_interval
+        self.on_change = on_change
+        self._next_purge = 0.0
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.purge_if_due()
+                sent = await self.flush_once()
+            except Exception as e:
+                logger.exception(f"🔥 Lead flusher error ({self.vertical}): {e}")
+                sent = 0
+            if sent:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def purge_if_due(self) -> int:
+        # Sent rows are only kept for a while so the table (and every /metrics count) stays small
+        now = time.monotonic()
+        if now < self._next_purge:
+            return 0
+        self._next_purge = now + self.purge_interval
+        purged = await asyncio.to_thread(self.spool.purge_sent, self.sent_retention, self.vertical)
+        if purged:
+            logger.info(f"🧹 Purged {purged} delivered {self.vertical} lead(s)")
+            await self._changed()
+        return purged
+
+    async def _changed(self) -> None:
+        if self.on_change is not None:
+            await asyncio.to_thread(self.on_change)
+
+    async def flush_once(self) -> int:
+        if not self.webhook_url:
+            return 0
+        batch = await asyncio.to_thread(self.spool.claim, self.batch_size, self.vertical)
+        if not batch:
+            return 0
+        ids = [row_id for row_id, _, _ in batch]
+        leads = [{**lead, "idempotency_key": key} for _, key, lead in batch]
+        body: Dict[str, Any] = leads[0] if self.batch_size == 1 else {"leads": leads}
+        batch_key = hashlib.sha256("|".join(key for _, key, _ in batch).encode()).hexdigest()
+        started = time.perf_counter()
+        try:
+            resp = await self.client.post(self.webhook_url, json=body, headers={"Idempotency-Key": batch_key})
+            # Apps Script appends the rows and then redirects; the redirect itself means delivered
+            delivered = resp.is_success or resp.is_redirect or any(r.is_redirect for r in resp.history)
+            error = None if delivered else f"HTTP {resp.status_code}: {resp.text[:200]}"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        outcome = "ok" if error is None else "error"
+        METRICS.observe("lead_webhook_seconds", time.perf_counter() - started, vertical=self.vertical, outcome=outcome)
+        METRICS.inc("lead_webhook_leads_total", len(ids), vertical=self.vertical, outcome=outcome)
+        if error is None:
+            await asyncio.to_thread(self.spool.mark_sent, ids)
+            await self._changed()
+            logger.info(f"🔁 Delivered {len(ids)} {self.vertical} lead(s) to Google Sheet")
+            return len(ids)
+        await asyncio.to_thread(
+            self.spool.mark_failed, ids, error, self.max_attempts, self.base_delay, self.max_delay
+        )
+        await self._changed()
+        logger.warning(f"⚠️ Google Sheet delivery failed for {len(ids)} {self.vertical} lead(s): {error}")
+        return 0
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import os
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class Vertical(BaseModel):
+    slug: str
+    label: str
+    default_agent: str
+    agent_field: str = "agent_name"
+    webhook_env: str
+
+    @property
+    def webhook_url(self) -> Optional[str]:
+        return os.environ.get(self.webhook_env)
+
+
+VERTICALS: Dict[str, Vertical] = {
+    v.slug: v
+    for v in [
+        Vertical(
+            slug="chiropractor",
+            label="Chiropractor",
+            default_agent="Riya",
+            webhook_env="GOOGLE_SHEET_WEBHOOK_CHIROPRACTOR",
+        ),
+        Vertical(
+            slug="ecommerce",
+            label="E-commerce",
+            default_agent="Ishita",
+            agent_field="agent",
+            webhook_env="GOOGLE_SHEET_WEBHOOK_ECOMMERCE",
+        ),
+        Vertical(
+            slug="real_estate",
+            label="Real Estate",
+            default_agent="Ananya",
+            webhook_env="GOOGLE_SHEET_WEBHOOK_REAL_ESTATE",
+        ),
+    ]
+}
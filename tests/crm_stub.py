@@ -0,0 +1,104 @@
+"""Local stand-in for the HubSpot and Zoho CRM endpoints.
+
+Implements just enough of the single-record and batch contact/lead APIs to
+exercise ``update_crm`` and ``bulk_update_crm`` without network access or
+real credentials (see ``test_crm_bulk.py``).
+"""
+
+from __future__ import annotations
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "CrmStub"
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep the console quiet
+        pass
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        path = self.path.split("?")[0]
+        self.server.record(path)
+        if path == "/crm/v3/objects/contacts/batch/create":
+            self._reply(*self.server.hubspot_batch(body.get("inputs") or []))
+        elif path == "/crm/v3/objects/contacts":
+            self._reply(201, {"id": self.server.next_id(), "properties": body.get("properties") or body})
+        elif path == "/crm/v2/Leads":
+            self._reply(*self.server.zoho_insert(body.get("data") or []))
+        else:
+            self._reply(404, {"message": f"No stub for {path}"})
+
+
+class CrmStub(ThreadingHTTPServer):
+    """Threaded stub server; ``requests`` lists the paths it was called with, ``batch_sizes`` the records per batch call."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.requests: List[str] = []
+        self.batch_sizes: List[int] = []
+        self._lock = threading.Lock()
+        self._ids = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.requests.append(path)
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._ids += 1
+            return str(self._ids)
+
+    def hubspot_batch(self, inputs: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        self.batch_sizes.append(len(inputs))
+        if len(inputs) > 100:
+            return 400, {"status": "error", "message": "Batch size exceeds 100"}
+        results, errors = [], []
+        for inp in inputs:
+            props = inp.get("properties") or {}
+            trace = inp.get("objectWriteTraceId")
+            if not props.get("email"):
+                errors.append(
+                    {"status": "error", "message": "Property email is required", "context": {"objectWriteTraceId": [trace]}}
+                )
+            else:
+                results.append({"id": self.next_id(), "properties": props, "objectWriteTraceId": trace})
+        # HubSpot returns results in no particular order
+        results.reverse()
+        body = {"status": "COMPLETE", "results": results}
+        if errors:
+            body.update(errors=errors, numErrors=len(errors))
+        return (207 if errors else 201), body
+
+    def zoho_insert(self, data: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        self.batch_sizes.append(len(data))
+        if len(data) > 100:
+            return 400, {"code": "LIMIT_EXCEEDED", "message": "Max 100 records per request"}
+        out = []
+        for rec in data:
+            if not rec.get("Last_Name"):
+                out.append({"code": "MANDATORY_NOT_FOUND", "message": "required field not found", "status": "error"})
+            else:
+                out.append({"code": "SUCCESS", "details": {"id": self.next_id()}, "message": "record added", "status": "success"})
+        return 201, {"data": out}
+
+    def start(self) -> "CrmStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
@@ -0,0 +1,101 @@
+"""Local stand-in for the ElevenLabs history API.
+
+Serves ``/v1/history`` (newest first, cursor paging) and
+``/v1/history/{id}``. It answers every 7th detail request with a 429 and
+keeps the ids in ``broken`` failing until they are removed again (see
+``test_backfill.py``).
+"""
+
+from __future__ import annotations
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Set
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "HistoryStub"
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep the console quiet
+        pass
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "0.05")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/v1/history":
+            q = parse_qs(url.query)
+            self._reply(200, self.server.page(int(q.get("page_size", ["100"])[0]), q.get("start_after_history_item_id", [None])[0]))
+        elif url.path.startswith("/v1/history/"):
+            self._reply(*self.server.detail(url.path.rsplit("/", 1)[1]))
+        else:
+            self._reply(404, {"detail": "not found"})
+
+
+class HistoryStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, items: int, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self._lock = threading.Lock()
+        self.items: List[Dict[str, Any]] = []  # newest first
+        self.detail_hits: Dict[str, int] = {}
+        self.page_sizes: List[int] = []
+        self.broken: Set[str] = set()
+        self._requests = 0
+        self.add_items(items)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def add_items(self, n: int) -> None:
+        with self._lock:
+            start = len(self.items)
+            now = int(time.time())
+            fresh = [
+                {"history_item_id": f"h{i:07d}", "date_unix": now - 60 * (10_000_000 - i), "text": f"Transcript of call {i}"}
+                for i in range(start, start + n)
+            ]
+            self.items[:0] = list(reversed(fresh))
+
+    def page(self, size: int, start_after: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.page_sizes.append(size)
+            pos = 0
+            if start_after:
+                pos = next((i + 1 for i, it in enumerate(self.items) if it["history_item_id"] == start_after), len(self.items))
+            chunk = self.items[pos : pos + size]
+            return {
+                "history": [{"history_item_id": it["history_item_id"], "date_unix": it["date_unix"]} for it in chunk],
+                "last_history_item_id": chunk[-1]["history_item_id"] if chunk else None,
+                "has_more": pos + size < len(self.items),
+            }
+
+    def detail(self, hid: str):
+        with self._lock:
+            self._requests += 1
+            if self._requests % 7 == 0:
+                return 429, {"detail": "rate limited"}
+            if hid in self.broken:
+                return 404, {"detail": "not found"}
+            item = next((it for it in self.items if it["history_item_id"] == hid), None)
+            if item is None:
+                return 404, {"detail": "not found"}
+            self.detail_hits[hid] = self.detail_hits.get(hid, 0) + 1
+            return 200, dict(item)
+
+    def start(self) -> "HistoryStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
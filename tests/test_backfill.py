@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from dashboard import http_clients, integrations, storage
+from dashboard.backfill import HistoryCache, backfill_history
+
+from .elevenlabs_stub import HistoryStub
+
+ITEMS = 300
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    stub = HistoryStub(ITEMS).start()
+    monkeypatch.setattr(integrations, "ELEVENLABS_API_BASE", stub.url)
+    # The real quota would make a run of hundreds of items take minutes
+    monkeypatch.setitem(
+        http_clients.PROVIDERS,
+        "elevenlabs",
+        http_clients.Provider(name="elevenlabs_stub", rate=2000, burst=200, base_delay=0.05),
+    )
+    storage.set_backend(storage.make_backend("sqlite", tmp_path))
+    yield stub
+    storage.set_backend(None)
+    stub.shutdown()
+
+
+def test_interrupted_backfill_resumes_without_refetching(stub, tmp_path):
+    cache = HistoryCache(tmp_path / "history.sqlite3")
+
+    def run(**kwargs):
+        return asyncio.run(
+            backfill_history(
+                "stub_client",
+                "stub_agent",
+                "stub-key",
+                concurrency=16,
+                page_size=PAGE_SIZE,
+                batch_size=250,
+                checkpoint_path=tmp_path / "checkpoint.json",
+                cache=cache,
+                **kwargs,
+            )
+        )
+
+    stub.broken.add(f"h{ITEMS // 2:07d}")
+    run(max_items=ITEMS // 3)
+    run()
+    # The broken item is picked up once it is repaired, along with newly arrived items
+    stub.broken.clear()
+    stub.add_items(25)
+    run()
+
+    stored = sum(1 for _ in storage.iter_call_records(client_id="stub_client"))
+    assert stored == ITEMS + 25
+    assert not [hid for hid, n in stub.detail_hits.items() if n > 1]
+    assert stub.page_sizes and max(stub.page_sizes) <= PAGE_SIZE
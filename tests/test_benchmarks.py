@@ -0,0 +1,84 @@
+"""Storage benchmarks under pytest-benchmark, over every backend and data size.
+
+Uses the seeded generators from ``dashboard.bench``. Scales come from
+``KALLIX_BENCH_SCALES`` (default ``1k``; e.g. ``1k,100k,1M``). Save a run
+and fail later runs that regress against it with:
+
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave
+    python -m pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+
+import itertools
+import os
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from dashboard import bench, storage  # noqa: E402
+
+BACKENDS = ("sqlite", "jsonl", "json")
+SCALES = [s.strip() for s in os.getenv("KALLIX_BENCH_SCALES", "1k").split(",") if s.strip()]
+CASES = list(itertools.product(BACKENDS, SCALES))
+IDS = [f"{backend}/{scale}" for backend, scale in CASES]
+
+
+@pytest.fixture(scope="module", params=CASES, ids=IDS)
+def loaded(request, tmp_path_factory):
+    backend_name, scale = request.param
+    n = bench.SCALES[scale]
+    bench.load(backend_name, n, data_dir=tmp_path_factory.mktemp(f"{backend_name}_{scale}"))
+    backend = storage.get_backend()
+    yield backend, n
+    storage.set_backend(None)
+
+
+@pytest.fixture
+def n(loaded):
+    # Tests of different parametrizations interleave; point storage back at this one's store
+    backend, n = loaded
+    storage.set_backend(backend)
+    return n
+
+
+@pytest.mark.parametrize("backend_name,scale", CASES, ids=IDS)
+def test_insert(benchmark, tmp_path, backend_name, scale):
+    rounds = iter(range(1000))
+
+    def fresh_store():
+        return (backend_name, bench.SCALES[scale]), {"data_dir": tmp_path / str(next(rounds))}
+
+    benchmark.pedantic(bench.load, setup=fresh_store, rounds=3 if bench.SCALES[scale] <= 10_000 else 1)
+    storage.set_backend(None)
+
+
+def test_list_page(benchmark, n):
+    benchmark(storage.list_call_records, per_page=50)
+
+
+def test_filter_page(benchmark, n):
+    benchmark(storage.list_call_records, client_id=bench.CLIENT, per_page=50)
+
+
+def test_sort_page(benchmark, n):
+    benchmark(storage.list_call_records, per_page=50, sort_by="callee", sort_order="asc")
+
+
+def test_deep_offset_page(benchmark, n):
+    benchmark(storage.list_call_records, page=max(1, n // 100), per_page=50)
+
+
+def test_cursor_pages(benchmark, n):
+    benchmark(bench.walk_cursor)
+
+
+def test_frame_filter_sort(benchmark, n):
+    storage.call_frame(per_page=50)  # build the snapshot outside the timed runs
+    benchmark(storage.call_frame, client_id=bench.CLIENT, sort_by="timestamp", sort_order="desc", per_page=50)
+
+
+def test_get_call(benchmark, n):
+    rng = random.Random(42)
+    result = benchmark(lambda: storage.get_call(f"call_{rng.randrange(n):08d}"))
+    assert result is not None
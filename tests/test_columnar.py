@@ -0,0 +1,61 @@
+import pytest
+
+from dashboard import storage
+from dashboard.schemas import CallRecord, ToolActionEvent
+
+
+@pytest.fixture(params=["sqlite", "jsonl", "json"])
+def store(request, tmp_path):
+    storage.set_backend(storage.make_backend(request.param, tmp_path))
+    yield
+    storage.set_backend(None)
+
+
+def _call(call_id: str) -> CallRecord:
+    return CallRecord(
+        call_id=call_id,
+        client_id="client_1",
+        timestamp="2026-01-01T00:00:00+00:00",
+        agent_id="agent_1",
+        callee="+15550000000",
+        transcript="hello",
+        audio_url="",
+        call_status="completed",
+        error_message=None,
+    )
+
+
+def test_write_after_empty_snapshot(store):
+    assert storage.call_frame()[1] == 0
+    storage.add_call_record(_call("call_1"))
+    frame, total = storage.call_frame(client_id="client_1")
+    assert total == 1
+    assert frame["call_id"].tolist() == ["call_1"]
+
+
+def test_action_write_after_empty_snapshot(store):
+    assert storage.action_frame()[1] == 0
+    storage.add_tool_action(
+        ToolActionEvent(
+            action_id="act_1",
+            client_id="client_1",
+            action_type="email",
+            status="success",
+            error_message=None,
+            timestamp="2026-01-01T00:00:00+00:00",
+        )
+    )
+    frame, total = storage.action_frame(status="success")
+    assert total == 1
+    assert frame["action_id"].tolist() == ["act_1"]
+
+
+def test_cached_sort_matches_backend_order(store):
+    for i, callee in enumerate(["+3", "+1", "+2", "+1"]):
+        call = _call(f"call_{i}")
+        storage.add_call_record(call.model_copy(update={"callee": callee, "call_status": "failed" if i % 2 else "completed"}))
+    for sort_order in ("asc", "desc"):
+        for status in (None, "failed"):
+            frame, _ = storage.call_frame(call_status=status, sort_by="callee", sort_order=sort_order, per_page=10)
+            resp = storage.list_call_records(call_status=status, sort_by="callee", sort_order=sort_order, per_page=10)
+            assert frame["call_id"].tolist() == [c["call_id"] for c in resp["items"]]
@@ -0,0 +1,54 @@
+import pytest
+
+from dashboard import integrations
+from dashboard.sync_ledger import SyncLedger
+
+from .crm_stub import CrmStub
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = CrmStub().start()
+    monkeypatch.setattr(integrations, "HUBSPOT_API_BASE", stub.url)
+    monkeypatch.setattr(integrations, "ZOHO_API_BASE", stub.url)
+    monkeypatch.setenv("HUBSPOT_PRIVATE_APP_TOKEN", "stub")
+    monkeypatch.setenv("ZOHO_OAUTH_TOKEN", "stub")
+    yield stub
+    stub.shutdown()
+
+
+def _records(crm: str, n: int):
+    # Every 50th record is invalid; every 20th repeats the email before it (never an invalid one)
+    out = []
+    for i in range(n):
+        email = f"lead{i - 1 if i % 20 == 5 else i}@example.com"
+        if crm == "hubspot":
+            out.append({"email": "" if i % 50 == 49 else email, "firstname": f"Lead {i}"})
+        else:
+            out.append({"Email": email, "Last_Name": "" if i % 50 == 49 else f"Lead {i}"})
+    return out
+
+
+@pytest.mark.parametrize("crm", ["hubspot", "zoho"])
+def test_bulk_sync_batches_and_skips_synced_records(stub, tmp_path, crm):
+    records = _records(crm, 1000)
+    ledger = SyncLedger(tmp_path / "ledger.sqlite3")
+
+    events = integrations.bulk_update_crm("stub_client", crm, records, ledger=ledger)
+    assert len(events) == 1000
+    assert [e["status"] for e in events].count("failed") == 20
+    assert stub.batch_sizes == [100] * 9 + [50]
+    assert not any(e["error_message"] for e in events if e["status"] == "success")
+
+    events = integrations.bulk_update_crm("stub_client", crm, records, ledger=ledger)
+    # Only the rejected records are sent again, in one batch
+    assert stub.batch_sizes[10:] == [20]
+    assert [e["status"] for e in events].count("failed") == 20
+
+
+def test_in_run_duplicates_share_the_first_outcome(stub, tmp_path):
+    records = [{"email": "a@example.com"}, {"email": ""}, {"email": "a@example.com"}, {"email": ""}]
+    events = integrations.bulk_update_crm("stub_client", "hubspot", records, ledger=SyncLedger(tmp_path / "l.sqlite3"))
+    assert [e["status"] for e in events] == ["success", "failed", "success", "failed"]
+    assert events[3]["error_message"] == events[1]["error_message"]
+    assert stub.batch_sizes == [2]
@@ -0,0 +1,25 @@
+from dashboard.backends.jsonl_log import JsonlLogBackend, _truncate_partial_line
+
+
+def _call(call_id: str) -> dict:
+    return {"call_id": call_id, "client_id": "client_1", "transcript": "hello"}
+
+
+def test_append_after_torn_line_keeps_the_new_record(tmp_path):
+    backend = JsonlLogBackend(tmp_path, fsync="never")
+    backend.append("calls", _call("call_1"))
+    # A crash mid-write leaves a line without its newline
+    with open(backend.log_paths["calls"], "ab") as f:
+        f.write(b'{"call_id": "call_2", "client_id": "cl')
+    backend.append("calls", _call("call_3"))
+
+    assert [it["call_id"] for it in JsonlLogBackend(tmp_path).read_all("calls")] == ["call_1", "call_3"]
+    assert backend.log_paths["calls"].read_bytes().endswith(b"\n")
+
+
+def test_truncate_partial_line_scans_back_across_chunks(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    path.write_bytes(b'{"a": 1}\n' + b"x" * 100)
+    assert _truncate_partial_line(path, chunk_size=16) == 100
+    assert path.read_bytes() == b'{"a": 1}\n'
+    assert _truncate_partial_line(path) == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from dashboard import retrieval, storage
+from dashboard.schemas import KnowledgeBaseEntry
+
+
+@pytest.fixture(params=["sqlite", "jsonl", "json"])
+def data_dir(request, tmp_path, monkeypatch):
+    storage.set_backend(storage.make_backend(request.param, tmp_path))
+    retrieval.set_retriever(None)
+    reads = []
+    fetch = storage.kb_entries_after
+
+    def counting(*args, **kwargs):
+        items, last = fetch(*args, **kwargs)
+        reads.append(len(items))
+        return items, last
+
+    monkeypatch.setattr(storage, "kb_entries_after", counting)
+    yield request.param, tmp_path, reads
+    retrieval.set_retriever(None)
+    storage.set_backend(None)
+
+
+def _entry(i: int, value: str) -> KnowledgeBaseEntry:
+    return KnowledgeBaseEntry(
+        kb_entry_id=f"kb{i}", client_id="acme", type="txt", value=value, created_at=f"2026-01-{i:02d}T00:00:00Z"
+    )
+
+
+def test_catch_up_reads_only_new_entries(data_dir):
+    backend_name, path, reads = data_dir
+    for i in range(1, 4):
+        storage.add_kb_entry(_entry(i, f"filler entry number {i}"))
+    retrieval.retrieve("acme", "filler")
+    assert sum(reads) == 3
+
+    # Written by another process, so only the signature tells the retriever about it
+    storage.make_backend(backend_name, path).append("kb_entries", _entry(4, "parking is free").model_dump())
+    assert retrieval.retrieve("acme", "free parking")[0]["kb_entry_id"] == "kb4"
+    assert sum(reads) == 4
+
+    retrieval.retrieve("acme", "free parking")
+    assert sum(reads) == 4
+
+
+def test_index_entry_does_not_reread_storage(data_dir):
+    _, _, reads = data_dir
+    storage.add_kb_entry(_entry(1, "we open at nine"))
+    retrieval.retrieve("acme", "nine")
+    before = len(reads)
+
+    saved = storage.add_kb_entry(_entry(2, "parking is free"))
+    assert retrieval.index_entry(saved) > 0
+    assert retrieval.retrieve("acme", "free parking")[0]["kb_entry_id"] == "kb2"
+    assert len(reads) == before